@@ -0,0 +1 @@
+from .fakecdn import CdnProfile, FakeCdn
@@ -0,0 +1,358 @@
+import hashlib
+import heapq
+import json
+import math
+import random
+import re
+import select
+import socket
+import ssl
+import subprocess
+import time
+from dataclasses import dataclass, asdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from threading import Lock, Thread
+
+from core import Url, UrlOrigin
+
+
+@dataclass(slots=True)
+class CdnProfile:
+    """假 CDN 的网络条件与内容规模, 相同的配置 (含随机种子) 总是生成相同的文件"""
+    latency: float = 0.02           # 首字节延迟 (秒)
+    jitter: float = 0.01            # 延迟随机抖动上限 (秒)
+    bandwidth: float = 0            # 每条连接的带宽 (MB/s), 0 表示不限
+    errorRate: float = 0            # 请求失败概率, 一半返回 503, 一半在传输中途断开
+    assets: int = 4000              # 资源文件数量
+    sizeMedian: int = 12 << 10      # 资源文件大小的对数正态分布中位数
+    sizeSigma: float = 1.4
+    sizeMax: int = 16 << 20
+    libraries: int = 60
+    librarySize: int = 256 << 10    # 依赖库大小中位数
+    clientSize: int = 24 << 20
+    seed: int = 1
+
+    def contentKey(self) -> str:
+        content = {k: v for k, v in asdict(self).items() if k not in ("latency", "jitter", "bandwidth", "errorRate")}
+        return hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class FakeCdn:
+    """
+    本地模拟 piston-meta / resources.download.minecraft.net / libraries.minecraft.net 三个主机,
+    文件生成在 root 下并按内容配置缓存, 支持 Range 请求;
+    tls=True 时资源主机使用 HTTPS 并通过 ALPN 提供 h2 (需要 openssl 命令与 h2 库), 客户端需信任 caFile
+    """
+    VERSION = "bench"
+
+    def __init__(self, profile: CdnProfile, root: Path, tls: bool = False):
+        self.profile = profile
+        self.tls = tls
+        self.caFile: Path | None = None
+        self.root = Path(root) / profile.contentKey()
+        self.random = random.Random(profile.seed)      # 生成文件内容
+        self.network = random.Random(profile.seed)     # 模拟延迟抖动与错误
+        self.servers: dict[str, ThreadingHTTPServer] = {}
+        self.versionUrl = ""
+        self.requests = 0
+        self.errors = 0
+        self._lock = Lock()
+
+    def count(self, error: bool = False):
+        with self._lock:
+            if error: self.errors += 1
+            else: self.requests += 1
+
+    def start(self) -> "FakeCdn":
+        self.generate()
+        context = None
+        if self.tls:
+            self.caFile, key = certificate(self.root.parent / "tls")
+            context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            context.load_cert_chain(self.caFile, key)
+            context.set_alpn_protocols(["h2", "http/1.1"])
+        for name in ("meta", "resources", "libraries"):
+            server = _Server(("127.0.0.1", 0), _Handler)
+            server.tls = context if name == "resources" else None    # 只有资源主机承载大量小文件请求
+            server.cdn = self
+            server.directory = self.root / name
+            Thread(target=server.serve_forever, daemon=True).start()
+            self.servers[name] = server
+        self.publish()
+        return self
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def base(self, name: str) -> str:
+        server = self.servers[name]
+        return f"{'https' if server.tls else 'http'}://127.0.0.1:{server.server_port}"
+
+    def origin(self) -> UrlOrigin:
+        return UrlOrigin(Url(self.base("meta")), Url(self.base("resources")), Url(self.base("libraries")))
+
+    def publish(self):
+        """端口确定后写出版本 JSON 与版本清单, 版本 JSON 的 SHA1 随地址变化"""
+        meta = self.root / "meta"
+        version = (self.root / "version.tmpl").read_bytes().replace(b"BASE", self.base("meta").encode())
+        versionSha1 = hashlib.sha1(version).hexdigest()
+        (meta / "v1" / "packages" / versionSha1).mkdir(parents=True, exist_ok=True)
+        (meta / "v1" / "packages" / versionSha1 / f"{self.VERSION}.json").write_bytes(version)
+        self.versionUrl = f"{self.base('meta')}/v1/packages/{versionSha1}/{self.VERSION}.json"
+        (meta / "mc" / "game").mkdir(parents=True, exist_ok=True)
+        (meta / "mc" / "game" / "version_manifest_v2.json").write_text(json.dumps({
+            "latest": {"release": self.VERSION},
+            "versions": [{"id": self.VERSION, "type": "release", "url": self.versionUrl, "sha1": versionSha1}]
+        }))
+
+    def _size(self, median: int) -> int:
+        size = int(self.random.lognormvariate(math.log(median), self.profile.sizeSigma))
+        return max(16, min(size, self.profile.sizeMax))
+
+    def _put(self, path: Path, size: int) -> tuple[str, int]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = self.random.randbytes(size)
+        path.write_bytes(data)
+        return hashlib.sha1(data).hexdigest(), size
+
+    def generate(self):
+        """生成资源文件 / 资源索引 / 依赖库 / 客户端与版本 JSON 模板, 已生成过时直接复用"""
+        done = self.root / "done"
+        if done.exists(): return
+        profile = self.profile
+        meta, resources, libraries = self.root / "meta", self.root / "resources", self.root / "libraries"
+
+        objects = {}
+        for i in range(profile.assets):
+            data = self.random.randbytes(size := self._size(profile.sizeMedian))
+            digest = hashlib.sha1(data).hexdigest()
+            (resources / digest[:2]).mkdir(parents=True, exist_ok=True)
+            (resources / digest[:2] / digest).write_bytes(data)
+            objects[f"minecraft/bench/{i // 100}/{i}.ogg"] = {"hash": digest, "size": size}
+        index = json.dumps({"objects": objects}).encode()
+        (meta / "indexes").mkdir(parents=True, exist_ok=True)
+        (meta / "indexes" / f"{self.VERSION}.json").write_bytes(index)
+
+        libs = []
+        for i in range(profile.libraries):
+            rel = f"org/bench/lib{i}/1.0/lib{i}-1.0.jar"
+            sha1, size = self._put(libraries / rel, self._size(profile.librarySize))
+            libs.append({"name": f"org.bench:lib{i}:1.0", "downloads": {"artifact": {
+                "path": rel, "sha1": sha1, "size": size, "url": f"https://libraries.minecraft.net/{rel}"
+            }}})
+        clientSha1, clientSize = self._put(meta / "client.jar", profile.clientSize)
+
+        (self.root / "version.tmpl").write_text(json.dumps({
+            "id": self.VERSION, "type": "release", "mainClass": "net.minecraft.client.main.Main",
+            "downloads": {"client": {"sha1": clientSha1, "size": clientSize, "url": "BASE/client.jar"}},
+            "assetIndex": {"id": self.VERSION, "sha1": hashlib.sha1(index).hexdigest(), "size": len(index),
+                           "url": f"BASE/indexes/{self.VERSION}.json"},
+            "libraries": libs
+        }))
+        done.touch()
+
+
+def certificate(directory: Path) -> tuple[Path, Path]:
+    """127.0.0.1 的自签名证书与私钥, 生成后缓存 (有效期 30 天, 20 天后重新生成)"""
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    if not cert.exists() or time.time() - cert.stat().st_mtime > 20 * 86400:
+        directory.mkdir(parents=True, exist_ok=True)
+        subprocess.run([
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", str(key), "-out", str(cert),
+            "-days", "30", "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"
+        ], check=True, capture_output=True)
+    return cert, key
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+    tls: ssl.SSLContext | None = None
+
+    def get_request(self):
+        sock, address = super().get_request()
+        # 握手放到处理线程中进行, 不阻塞 accept
+        if self.tls: sock = self.tls.wrap_socket(sock, server_side=True, do_handshake_on_connect=False)
+        return sock, address
+
+    def handle_error(self, request, address):
+        ...
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    CHUNK = 65536
+
+    def log_message(self, *args):
+        ...
+
+    def setup(self):
+        if isinstance(self.request, ssl.SSLSocket): self.request.do_handshake()
+        super().setup()
+
+    def handle(self):
+        if isinstance(self.request, ssl.SSLSocket) and self.request.selected_alpn_protocol() == "h2":
+            return _H2Connection(self.request, self.server).run()
+        super().handle()
+
+    def do_HEAD(self):
+        self.do_GET(body=False)
+
+    def do_GET(self, body: bool = True):
+        cdn: FakeCdn = self.server.cdn
+        profile = cdn.profile
+        cdn.count()
+        time.sleep(profile.latency + cdn.network.random() * profile.jitter)
+
+        path = (self.server.directory / self.path.split("?")[0].lstrip("/")).resolve()
+        if not path.is_relative_to(self.server.directory.resolve()) or not path.is_file():
+            return self._empty(404)
+        error = cdn.network.random() < profile.errorRate
+        if error and cdn.network.random() < 0.5:
+            cdn.count(True)
+            return self._empty(503)
+
+        data = path.read_bytes()
+        start, end = 0, len(data) - 1
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match and int(match[1]) < len(data):
+            start, end = int(match[1]), min(int(match[2]) if match[2] else end, end)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        if not body: return
+
+        rate = profile.bandwidth * 1048576
+        began = time.monotonic()
+        sent = 0
+        if error: end = start + (end - start) // 2     # 只发送一半后断开连接
+        try:
+            for offset in range(start, end + 1, self.CHUNK):
+                chunk = data[offset:min(offset + self.CHUNK, end + 1)]
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                if rate and (wait := sent / rate - (time.monotonic() - began)) > 0:
+                    time.sleep(wait)
+            if error:
+                cdn.count(True)
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            self.close_connection = True
+
+    def _empty(self, status: int):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class _H2Connection:
+    """
+    单条 TLS 连接上的 HTTP/2 服务: 每个流按模拟延迟排队, 到期后发送响应头,
+    响应体在流量控制窗口内轮流发送, 整条连接共享带宽限制 (与 HTTP/1.1 的每连接带宽一致)
+    """
+    CHUNK = 16384
+
+    def __init__(self, sock: ssl.SSLSocket, server: _Server):
+        import h2.config
+        import h2.connection
+        import h2.settings
+        self.sock = sock
+        self.cdn: FakeCdn = server.cdn
+        self.directory = server.directory.resolve()
+        self.conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        self.due: list[tuple[float, int, int, str]] = []    # (到期时间, 序号, 流 ID, 路径)
+        self.sending: dict[int, list] = {}                  # 流 ID -> [数据, 已发送, 结束位置, 是否中途断开]
+        self.seq = 0
+        self.began = time.monotonic()
+        self.sent = 0
+
+    def run(self):
+        import h2.events
+        import h2.exceptions
+        self.conn.initiate_connection()
+        self.conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 256})
+        rate = self.cdn.profile.bandwidth * 1048576
+        try:
+            while True:
+                self._flush()
+                now = time.monotonic()
+                timeout = None
+                if self.due: timeout = max(0.0, self.due[0][0] - now)
+                if any(self.conn.local_flow_control_window(sid) > 0 for sid in self.sending):
+                    pace = self.began + self.sent / rate - now if rate else 0
+                    timeout = max(0.0, min(pace, timeout) if timeout is not None else pace)
+                if self.sock.pending() or select.select([self.sock], [], [], timeout)[0]:
+                    if not (data := self.sock.recv(65536)): return
+                    for event in self.conn.receive_data(data):
+                        if isinstance(event, h2.events.RequestReceived):
+                            self._request(event)
+                        elif isinstance(event, h2.events.DataReceived):
+                            self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                        elif isinstance(event, h2.events.StreamReset):
+                            self.sending.pop(event.stream_id, None)
+                        elif isinstance(event, h2.events.ConnectionTerminated):
+                            self._flush()
+                            return
+                now = time.monotonic()
+                while self.due and self.due[0][0] <= now:
+                    self._respond(*heapq.heappop(self.due)[2:])
+                if not rate or self.began + self.sent / rate <= now: self._send()
+        except (OSError, h2.exceptions.ProtocolError):
+            return
+
+    def _flush(self):
+        if data := self.conn.data_to_send(): self.sock.sendall(data)
+
+    def _request(self, event):
+        headers = dict(event.headers)
+        path = headers.get(b":path", b"/").decode()
+        profile = self.cdn.profile
+        self.cdn.count()
+        self.seq += 1
+        due = time.monotonic() + profile.latency + self.cdn.network.random() * profile.jitter
+        heapq.heappush(self.due, (due, self.seq, event.stream_id, path))
+
+    def _respond(self, streamId: int, path: str):
+        from h2.exceptions import StreamClosedError
+        cdn = self.cdn
+        file = (self.directory / path.split("?")[0].lstrip("/")).resolve()
+        try:
+            if not file.is_relative_to(self.directory) or not file.is_file():
+                return self.conn.send_headers(streamId, [(":status", "404"), ("content-length", "0")], end_stream=True)
+            error = cdn.network.random() < cdn.profile.errorRate
+            if error and cdn.network.random() < 0.5:
+                cdn.count(True)
+                return self.conn.send_headers(streamId, [(":status", "503"), ("content-length", "0")], end_stream=True)
+            data = file.read_bytes()
+            self.conn.send_headers(streamId, [(":status", "200"), ("content-length", str(len(data)))],
+                                   end_stream=not data)
+            # 模拟中途断开: 只发送一半后重置该流
+            if data: self.sending[streamId] = [data, 0, len(data) // 2 if error else len(data), error]
+        except StreamClosedError:
+            self.sending.pop(streamId, None)
+
+    def _send(self):
+        """在流量控制窗口内轮流为每个流发送一块数据"""
+        from h2.errors import ErrorCodes
+        for streamId, state in list(self.sending.items()):
+            data, offset, end, error = state
+            size = min(self.conn.local_flow_control_window(streamId), self.conn.max_outbound_frame_size,
+                       self.CHUNK, end - offset)
+            if size <= 0 and offset < end: continue
+            last = offset + size >= end
+            self.conn.send_data(streamId, data[offset:offset + size], end_stream=last and not error)
+            state[1] += size
+            self.sent += size
+            if last:
+                del self.sending[streamId]
+                if error:
+                    self.cdn.count(True)
+                    self.conn.reset_stream(streamId, ErrorCodes.INTERNAL_ERROR)
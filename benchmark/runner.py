@@ -0,0 +1,171 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, fields
+from pathlib import Path
+
+from .fakecdn import CdnProfile, FakeCdn
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values: return 0
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def peakRss() -> float | None:
+    """当前进程的峰值常驻内存 (MB)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1048576 if sys.platform == "darwin" else rss / 1024
+
+
+def install(origin: dict, versionUrl: str, options: dict) -> dict:
+    """在独立子进程中执行一次安装, 峰值内存不受其他轮次与假 CDN 影响"""
+    from core import ORIGINS, InstallOptions, Installer, UrlOrigin, Url
+
+    origins = dict(ORIGINS, Bench=UrlOrigin(*(Url(origin[k]) for k in ("Versions", "Assets", "Library"))))
+    installer = Installer(origins, InstallOptions(**options))
+    start = time.monotonic()
+    progress = installer.install(FakeCdn.VERSION, versionUrl)
+    elapsed = time.monotonic() - start
+    snapshot = progress.snapshot()
+    latencies = progress.latencies()
+    stats = progress.trace.stats()
+    return {
+        "elapsed": elapsed,
+        "files": snapshot.files,
+        "completed": snapshot.completed,
+        "skipped": snapshot.skipped,
+        "failed": snapshot.failed,
+        "bytes": snapshot.bytes,
+        "filesPerSec": snapshot.files / elapsed,
+        "mbPerSec": snapshot.bytes / elapsed / 1048576,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "ttfbP50": stats.ttfbP50,
+        "ttfbP95": stats.ttfbP95,
+        "connects": stats.connects,
+        "retries": stats.retries,
+        "protocols": stats.protocols,
+        "verifySeconds": stats.verifyTime,
+        "peakRssMB": peakRss()
+    }
+
+
+def gitCommit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=Path(__file__).parent, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="基于本地假 CDN 的安装性能测试")
+    defaults = CdnProfile()
+    group = parser.add_argument_group("假 CDN")
+    for field in fields(CdnProfile):
+        group.add_argument(
+            "--" + re.sub(r"[A-Z]", lambda m: "-" + m[0].lower(), field.name), dest=field.name,
+            type=field.type, default=getattr(defaults, field.name)
+        )
+    parser.add_argument("--engine", nargs="+", default=["Thread", "Asyncio"], choices=["Thread", "Asyncio", "Http2"],
+                        help="Http2: 异步引擎 + HTTP/2, 资源主机改用 HTTPS (h2)")
+    parser.add_argument("--tls", action="store_true", help="资源主机使用 HTTPS, 选择 Http2 时自动开启")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--adaptive", action="store_true", help="自适应并发 (--threads 为上限)")
+    parser.add_argument("--bandwidth-limit", type=float, default=0, help="客户端带宽上限 (Mbps)")
+    parser.add_argument("--async-tasks", type=int, default=256)
+    parser.add_argument("--segments", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--repeat", type=int, default=1, help="每种引擎重复冷/热安装的次数")
+    parser.add_argument("--cache", default=str(Path(tempfile.gettempdir()) / "MinecraftLauncherDemo" / "bench-cdn"),
+                        help="假 CDN 文件缓存目录")
+    parser.add_argument("--output", help="结果 JSON 路径, 默认写入 benchmark/results/")
+    parser.add_argument("--baseline", help="与之前的结果 JSON 对比")
+    return parser.parse_args(argv)
+
+
+def printTable(results: list[dict], baseline: dict = None):
+    print(f"{'引擎':<8}{'轮次':<6}{'耗时 s':>9}{'文件/s':>11}{'MB/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'RSS MB':>9}{'失败':>6}")
+    for r in results:
+        line = (f"{r['engine']:<8}{r['phase']:<6}{r['elapsed']:>9.2f}{r['filesPerSec']:>11.1f}{r['mbPerSec']:>9.2f}"
+                f"{r['p50'] * 1000:>9.1f}{r['p99'] * 1000:>9.1f}{r['peakRssMB'] or 0:>9.1f}{r['failed']:>6}")
+        if baseline and (old := baseline.get((r["engine"], r["phase"], r["run"]))):
+            line += f"   文件/s {(r['filesPerSec'] / old['filesPerSec'] - 1) * 100:+.1f}%"
+        print(line)
+
+
+def main(argv=None) -> int:
+    args = parseArgs(argv)
+    profile = CdnProfile(**{field.name: getattr(args, field.name) for field in fields(CdnProfile)})
+    print(f"⚙️ 生成假 CDN 内容: {profile.assets} 个资源文件, {profile.libraries} 个依赖库")
+    tls = args.tls or "Http2" in args.engine
+    cdn = FakeCdn(profile, Path(args.cache), tls=tls).start()
+    if tls:
+        # 子进程继承环境变量, httpx 与 requests 都信任假 CDN 的自签名证书
+        os.environ["SSL_CERT_FILE"] = os.environ["REQUESTS_CA_BUNDLE"] = str(cdn.caFile)
+    origin = {k: str(getattr(cdn.origin(), k)) for k in ("Versions", "Assets", "Library")}
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    try:
+        for engine in args.engine:
+            for run in range(args.repeat):
+                workDir = Path(tempfile.mkdtemp(prefix="mcl-bench-"))
+                options = {
+                    "minecraftPath": workDir / ".minecraft", "origin": "Bench", "threads": args.threads,
+                    "timeout": args.timeout, "retries": args.retries, "asyncTasks": args.async_tasks,
+                    "engine": "Asyncio" if engine == "Http2" else engine, "http2": engine == "Http2",
+                    "segments": args.segments, "indexPath": workDir / "verified.db", "adaptive": args.adaptive,
+                    "bandwidthLimit": args.bandwidth_limit * 125000
+                }
+                try:
+                    # 冷安装: 空目录与空索引; 热安装: 同一目录再装一次, 全部命中已有文件
+                    for phase in ("cold", "warm"):
+                        with context.Pool(1) as pool:
+                            result = pool.apply(install, (origin, cdn.versionUrl, options))
+                        results.append({"engine": engine, "phase": phase, "run": run, **result})
+                        print(f"✅ {engine} {phase} #{run}: {result['elapsed']:.2f} s")
+                finally:
+                    shutil.rmtree(workDir, ignore_errors=True)
+    finally:
+        cdn.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = {(r["engine"], r["phase"], r["run"]): r for r in json.load(f)["results"]}
+    print()
+    printTable(results, baseline)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": gitCommit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "profile": asdict(profile),
+            "options": {k: v for k, v in vars(args).items() if k not in asdict(profile)},
+            "cdn": {"requests": cdn.requests, "errors": cdn.errors},
+            "results": results
+        }, f, ensure_ascii=False, indent=2)
+    print(f"📄 结果已保存: {output}")
+    return 0
@@ -0,0 +1,170 @@
+"""
+命令行安装入口, 不依赖 Qt, 可在无界面的机器上批量安装或测速:
+
+    python cli.py 1.20.1 1.19.4 --path ./.minecraft --threads 32 --engine Asyncio
+
+安装后作为局域网缓存服务器运行 (其他启动器使用 --origin Lan --lan http://本机IP:25580):
+
+    python cli.py 1.20.1 --path ./.minecraft --serve
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from threading import Event, Thread
+
+from core import ORIGINS, LAN_PORT, InstallOptions, InstallListener, Installer, Progress, ProgressSnapshot, sessions, Manifest, \
+    fetchManifest, setLanOrigin, CacheServer
+
+
+class ConsoleListener(InstallListener):
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+        self.progress: Progress | None = None
+
+    def info(self, text: str):
+        sys.stdout.write(text + "\n")    # 多个下载线程同时输出时保持整行
+
+    def fileInfo(self, text: str):
+        if self.verbose: sys.stdout.write(text + "\n")
+
+    def started(self, progress: Progress):
+        self.progress = progress
+
+
+def formatStats(title: str, snapshot: ProgressSnapshot) -> str:
+    elapsed = max(snapshot.elapsed, 1e-9)
+    return (
+        f"{title}: {snapshot.files}/{snapshot.totalFiles} 个文件 "
+        f"(下载 {snapshot.completed}, 跳过 {snapshot.skipped}, 失败 {snapshot.failed}), "
+        f"{snapshot.bytes / 1048576:.1f} MB / {snapshot.elapsed:.2f} s, "
+        f"{snapshot.speed / 1048576:.2f} MB/s, {snapshot.files / elapsed:.1f} 文件/s"
+    )
+
+
+def showProgress(listener: ConsoleListener, stop: Event):
+    """终端中每半秒刷新一行进度"""
+    while not stop.wait(0.5):
+        if listener.progress is None: continue
+        snapshot = listener.progress.snapshot()
+        sys.stderr.write(
+            f"\r{snapshot.stage}  {snapshot.files}/{snapshot.totalFiles}  {snapshot.speed / 1048576:.2f} MB/s    "
+        )
+        sys.stderr.flush()
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(description="MinecraftLauncherDemo 命令行安装")
+    parser.add_argument("versions", nargs="*", help="版本号, release / snapshot 表示最新版本")
+    parser.add_argument("--path", default="./.minecraft", help="minecraftPath")
+    parser.add_argument("--origin", default="Official", choices=list(ORIGINS), help="下载源")
+    parser.add_argument("--lan", help="局域网缓存地址 (--origin Lan 时使用), 如 http://192.168.1.2:25580")
+    parser.add_argument("--threads", type=int, default=16, help="线程数 (连接池大小), 自适应时为上限")
+    parser.add_argument("--adaptive", action="store_true", help="自适应并发")
+    parser.add_argument("--bandwidth", type=float, default=0, help="带宽上限 (Mbps), 0 表示不限")
+    parser.add_argument("--engine", default="Thread", choices=["Thread", "Asyncio"], help="下载引擎")
+    parser.add_argument("--http2", action="store_true", help="资源文件使用 HTTP/2 多路复用 (需要 httpx[http2])")
+    parser.add_argument("--async-tasks", type=int, default=256, help="异步引擎并发数")
+    parser.add_argument("--timeout", type=float, default=10, help="超时时间 (秒)")
+    parser.add_argument("--retries", type=int, default=3, help="重试次数")
+    parser.add_argument("--segments", type=int, default=4, help="大文件分段数")
+    parser.add_argument("--segment-threshold", type=int, default=8, help="分段下载阈值 (MB)")
+    parser.add_argument("--race", action="store_true", help="多下载源测速择优")
+    parser.add_argument("--index", default=str(Path(tempfile.gettempdir()) / "MinecraftLauncherDemo" / "verified.db"),
+                        help="已校验文件索引, 传空字符串禁用")
+    parser.add_argument("--meta-cache", default=str(Path(tempfile.gettempdir()) / "MinecraftLauncherDemo" / "meta"),
+                        help="版本 JSON / 资源索引缓存目录, 传空字符串禁用")
+    parser.add_argument("--store", help="多个实例共用的全局对象库目录 (按 SHA1 存放)")
+    parser.add_argument("--trace", help="性能追踪导出目录, 每个版本写出 <版本>.jsonl 与 <版本>.trace.json (Chrome Trace)")
+    parser.add_argument("--serve", type=int, nargs="?", const=LAN_PORT,
+                        help=f"安装结束后作为局域网缓存服务器运行, 默认端口 {LAN_PORT}")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出每个文件的日志")
+    args = parser.parse_args(argv)
+    if not args.versions and args.serve is None: parser.error("需要指定版本号或 --serve")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parseArgs(argv)
+    if args.lan: setLanOrigin(args.lan)
+    if not args.versions:
+        serve(args)
+        return 0
+    options = InstallOptions(
+        Path(args.path),
+        origin=args.origin,
+        threads=args.threads,
+        adaptive=args.adaptive,
+        bandwidthLimit=args.bandwidth * 125000,
+        timeout=args.timeout,
+        retries=args.retries,
+        engine=args.engine,
+        asyncTasks=args.async_tasks,
+        originRace=args.race,
+        segments=args.segments,
+        segmentMinSize=args.segment_threshold << 20,
+        indexPath=Path(args.index) if args.index else None,
+        metaCachePath=Path(args.meta_cache) if args.meta_cache else None,
+        storePath=Path(args.store) if args.store else None,
+        http2=args.http2
+    )
+    listener = ConsoleListener(args.verbose)
+    installer = Installer(ORIGINS, options, listener)
+
+    manifest = Manifest.fromJson(fetchManifest(installer.origin, installer.session(), args.timeout))
+
+    stop = Event()
+    if sys.stderr.isatty(): Thread(target=showProgress, args=(listener, stop), daemon=True).start()
+    results: list[tuple[str, ProgressSnapshot]] = []
+    traces = []
+    start = time.monotonic()
+    try:
+        for ver in args.versions:
+            if (version := manifest.find(ver)) is None:
+                print(f"❌ 找不到版本: {ver}", flush=True)
+                results.append((ver, ProgressSnapshot(totalFiles=1, failed=1)))
+                continue
+            progress = installer.install(version["id"], version["url"], version.get("sha1"))
+            results.append((version["id"], progress.snapshot()))
+            traces.append(progress.trace)
+    finally:
+        stop.set()
+        sessions.close()
+    if sys.stderr.isatty(): sys.stderr.write("\n")
+
+    print()
+    for ver, snapshot in results:
+        print(formatStats(ver, snapshot))
+    for trace in traces:
+        print(f"  {trace.name}: {trace.stats()}")
+        if args.trace:
+            Path(args.trace).mkdir(parents=True, exist_ok=True)
+            trace.exportJsonl(Path(args.trace) / f"{trace.name}.jsonl")
+            trace.exportChrome(Path(args.trace) / f"{trace.name}.trace.json")
+    total = sum((snapshot for _, snapshot in results), ProgressSnapshot())
+    total.elapsed = time.monotonic() - start
+    print(formatStats("总计", total))
+    if args.serve is not None: serve(args)
+    return 1 if total.failed else 0
+
+
+def serve(args):
+    """作为局域网缓存服务器运行, 直到 Ctrl+C"""
+    server = CacheServer(
+        Path(args.path), metaCachePath=Path(args.meta_cache) if args.meta_cache else None,
+        storePath=Path(args.store) if args.store else None,
+        upstream=ORIGINS[args.origin] if args.origin != "Lan" else ORIGINS["Official"], port=args.serve
+    ).start()
+    print(f"📡 局域网缓存服务已启动: 端口 {server.port}, Ctrl+C 停止", flush=True)
+    try:
+        while True:
+            time.sleep(60)
+            print(f"📡 {server}", flush=True)
+    except KeyboardInterrupt: ...
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,38 +1,11 @@
 import os
 import tempfile
-from dataclasses import dataclass
 from enum import Enum
-from pathlib import Path
 
-from qfluentwidgets import ConfigItem, QConfig, OptionsConfigItem, OptionsValidator, ConfigSerializer, EnumSerializer
+from qfluentwidgets import ConfigItem, QConfig, OptionsConfigItem, OptionsValidator, ConfigSerializer, EnumSerializer, \
+    BoolValidator
 
-class Url:
-    def __init__(self, url: str | Path):
-        if isinstance(url, str):
-            self.url = url
-        elif isinstance(url, Path):
-            self.url = str(url)
-        elif isinstance(url, Url):
-            self.url = url.url
-        else:
-            raise TypeError
-
-    def __str__(self):
-        return self.url
-
-    def __divmod__(self, other):
-        return Url(self.url + f"/{other}")
-
-    def __truediv__(self, other):
-        return Url(self.url + f"/{other}")
-
-    __repr__ = __str__
-
-@dataclass(slots=True)
-class UrlOrigin:
-    Versions: Url
-    Assets: Url
-    Library: Url
+from core.url import Url, UrlOrigin, ORIGINS, LAN_PORT
 
 class UrlOriginSerializer(ConfigSerializer):
     def __init__(self, enumClass):
@@ -46,28 +19,46 @@ class UrlOriginSerializer(ConfigSerializer):
 
 class Config(QConfig):
     class VersionsOrigin(Enum):
-        Official = UrlOrigin(
-            Url("https://piston-meta.mojang.com"),
-            Url("https://resources.download.minecraft.net"),
-            Url("https://libraries.minecraft.net")
-        )
-        BmclApi = UrlOrigin(
-            Url("https://bmclapi2.bangbang93.com"),
-            Url("https://bmclapi2.bangbang93.com/assets"),
-            Url("https://bmclapi2.bangbang93.com/maven")
-        )
+        Official = ORIGINS["Official"]
+        BmclApi = ORIGINS["BmclApi"]
+        Lan = ORIGINS["Lan"]     # 局域网缓存, 地址见 lanOrigin
 
     tempPath = ConfigItem("Temp", "TempPath", tempfile.gettempdir(), restart=False)
 
     minecraftPath = ConfigItem("Minecraft", "MinecraftPath", os.path.join(os.getcwd(), ".minecraft"), restart=False)
+    objectStore = ConfigItem("Minecraft", "ObjectStore", False, BoolValidator())
+    objectStorePath = ConfigItem(
+        "Minecraft", "ObjectStorePath", os.path.join(os.path.expanduser("~"), ".MinecraftLauncherDemo", "objects"), restart=False
+    )
 
     versionsOrigin = OptionsConfigItem(
         "Version", "VersionOrigin", VersionsOrigin.Official, OptionsValidator(VersionsOrigin), UrlOriginSerializer(VersionsOrigin)
     )
     # EnumSerializer
+    lanOrigin = ConfigItem("Version", "LanOrigin", f"http://192.168.1.2:{LAN_PORT}", restart=False)
 
     downloadTimeout = ConfigItem("Download", "DownloadTimeout", 10, restart=False)
     downloadCount = ConfigItem("Download", "DownloadCount", 3, restart=False)
     downloadTask = ConfigItem("Download", "DownloadTask", 16, restart=False)
+    adaptiveConcurrency = ConfigItem("Download", "AdaptiveConcurrency", False, BoolValidator())
+    bandwidthLimit = ConfigItem("Download", "BandwidthLimit", 0, restart=False)    # Mbps, 0 表示不限
+    downloadEngine = OptionsConfigItem("Download", "DownloadEngine", "Thread", OptionsValidator(["Thread", "Asyncio"]))
+    asyncTask = ConfigItem("Download", "AsyncTask", 256, restart=False)
+    originRace = ConfigItem("Download", "OriginRace", False, BoolValidator())
+    downloadSegments = ConfigItem("Download", "DownloadSegments", 4, restart=False)
+    segmentThreshold = ConfigItem("Download", "SegmentThreshold", 8, restart=False)    # MB
+    prefetchMeta = ConfigItem("Download", "PrefetchMeta", True, BoolValidator())
+    http2 = ConfigItem("Download", "Http2", False, BoolValidator())
+
+    javaPath = ConfigItem("Launch", "JavaPath", "java", restart=False)
+    maxMemory = ConfigItem("Launch", "MaxMemory", 2048, restart=False)    # MB
+    playerName = ConfigItem("Launch", "PlayerName", "Steve", restart=False)
+    lastVersion = ConfigItem("Launch", "LastVersion", "", restart=False)
+
+    lanServer = ConfigItem("LanServer", "Enabled", False, BoolValidator())
+    lanServerPort = ConfigItem("LanServer", "Port", LAN_PORT, restart=False)
+
+    logCapacity = ConfigItem("Log", "LogCapacity", 2000, restart=False)
+    logSpill = ConfigItem("Log", "LogSpill", False, BoolValidator())
 
 cfg = Config()
@@ -0,0 +1,21 @@
+from .url import Url, UrlOrigin, ORIGINS, LAN_PORT, lanOrigin, setLanOrigin
+from .telemetry import Transfer, currentTransfer, TransferStats, Trace
+from .session import SessionPool, sessions
+from .download import Cancelled, fileSha1, fetchFile
+from .aio import AsyncHttpClient, AsyncDownloader, HttpError
+from .http2 import Http2Client, http2Available
+from .index import FileIndex, openFileIndex
+from .store import reflink, ObjectStore
+from .plan import scanTree, DownloadPlan, planDownloads
+from .library import Artifact, osName, ruleAllows, libraryArtifacts, mavenPath, mirrorUrl, mirrorMetaUrl
+from .natives import ExtractStats, extractArchive, extractNatives
+from .launch import (LaunchPlan, PreparedLaunch, substitute, loadVersion, buildLaunchPlan, launchPlanPath, preparePlan,
+                     offlineValues, launchGame)
+from .origin import OriginStats, OriginRouter
+from .progress import ProgressSnapshot, Progress
+from .retry import RetryLater, backoff, RetryBudget, retryBudget
+from .throttle import TokenBucket, AdaptiveConcurrency, bandwidth
+from .scheduler import SharedProgress, Scheduler, scheduler
+from .manifest import versionCategory, Manifest, ManifestCache, fetchManifest
+from .lan import CacheServer
+from .installer import InstallOptions, InstallListener, Installer
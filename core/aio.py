@@ -0,0 +1,340 @@
+import asyncio
+import hashlib
+import os
+import socket
+import ssl
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlsplit, urljoin
+
+from .download import fileSha1
+from .index import FileIndex
+from .origin import OriginRouter
+from .progress import Progress
+from .retry import RetryLater, backoff, retryBudget
+from .store import ObjectStore
+from .telemetry import Transfer, currentTransfer
+from .throttle import AdaptiveConcurrency, TokenBucket
+
+REDIRECT_STATUS = (301, 302, 303, 307, 308)
+
+
+class HttpError(Exception):
+    ...
+
+
+class AsyncHttpClient:
+    """基于 asyncio 的最小 HTTP/1.1 客户端, 按主机复用长连接 (仅 GET)"""
+
+    def __init__(self, timeout: float = 10, maxRedirects: int = 5, userAgent: str = "MinecraftLauncherDemo",
+                 throttle: TokenBucket = None):
+        self.timeout = timeout
+        self.throttle = throttle
+        self.maxRedirects = maxRedirects
+        self.userAgent = userAgent
+        self._idle: dict[tuple, list[tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self._ssl = ssl.create_default_context()
+
+    async def _open(self, key: tuple, fresh: bool = False):
+        idle = self._idle.get(key)
+        while idle and not fresh:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key
+        start = time.monotonic()
+        # 单独解析地址以分别记录 DNS 与建立连接的耗时, 依次尝试解析到的各个地址
+        addresses = await asyncio.wait_for(
+            asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM), self.timeout
+        )
+        resolved = time.monotonic()
+        error = None
+        for *_, address in addresses:
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                    address[0], port, ssl=self._ssl if scheme == "https" else None,
+                    server_hostname=host if scheme == "https" else None
+                ), self.timeout)
+                break
+            except (OSError, asyncio.TimeoutError) as e:
+                error = e
+        else:
+            raise error or OSError(f"无法解析 {host}")
+        if (transfer := currentTransfer.get()) is not None:
+            transfer.dns, transfer.connect = resolved - start, time.monotonic() - resolved
+        return reader, writer, False
+
+    def _release(self, key: tuple, reader, writer, reusable: bool):
+        if reusable and not reader.at_eof():
+            self._idle.setdefault(key, []).append((reader, writer))
+        else:
+            writer.close()
+
+    async def _readLine(self, reader: asyncio.StreamReader) -> bytes:
+        line = await asyncio.wait_for(reader.readline(), self.timeout)
+        if not line: raise asyncio.IncompleteReadError(b"", None)
+        return line
+
+    async def _readHead(self, reader: asyncio.StreamReader) -> tuple[int, str, dict[str, str]]:
+        version, status, *_ = (await self._readLine(reader)).decode("latin-1").split(" ", 2)
+        headers = {}
+        while (line := await self._readLine(reader)) not in (b"\r\n", b"\n"):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return int(status), version, headers
+
+    async def _readBody(self, reader: asyncio.StreamReader, headers: dict[str, str], sink: Callable[[bytes], None],
+                        chunkSize: int) -> bool:
+        """按 Content-Length / chunked / 直到 EOF 读取响应体, 返回连接是否可复用"""
+
+        async def readExactly(n: int):
+            while n:
+                data = await asyncio.wait_for(reader.read(min(chunkSize, n)), self.timeout)
+                if not data: raise asyncio.IncompleteReadError(b"", n)
+                sink(data)
+                n -= len(data)
+                await pace(len(data))
+
+        async def pace(n: int):
+            if self.throttle and (delay := self.throttle.reserve(n)) > 0: await asyncio.sleep(delay)
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while size := int((await self._readLine(reader)).split(b";")[0], 16):
+                await readExactly(size)
+                await self._readLine(reader)
+            while await self._readLine(reader) not in (b"\r\n", b"\n"): ...    # trailer
+            return True
+        if "content-length" in headers:
+            await readExactly(int(headers["content-length"]))
+            return True
+        while data := await asyncio.wait_for(reader.read(chunkSize), self.timeout):
+            sink(data)
+            await pace(len(data))
+        return False
+
+    async def get(self, url: str, sink: Callable[[bytes], None], chunkSize: int = 65536):
+        """GET 请求并把响应体分块交给 sink, 自动跟随重定向"""
+        for _ in range(self.maxRedirects + 1):
+            parts = urlsplit(url)
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            key = (parts.scheme, parts.hostname, port)
+            host = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            request = (
+                f"GET {target} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {self.userAgent}\r\n"
+                f"Accept-Encoding: identity\r\nConnection: keep-alive\r\n\r\n"
+            ).encode("latin-1")
+
+            reader, writer, reused = await self._open(key)
+            sent = time.monotonic()
+            try:
+                try:
+                    writer.write(request)
+                    await writer.drain()
+                    status, version, headers = await self._readHead(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    if not reused: raise
+                    # 空闲长连接可能已被服务器关闭, 换新连接重发一次
+                    writer.close()
+                    reader, writer, reused = await self._open(key, fresh=True)
+                    sent = time.monotonic()
+                    writer.write(request)
+                    await writer.drain()
+                    status, version, headers = await self._readHead(reader)
+                if (transfer := currentTransfer.get()) is not None:
+                    transfer.ttfb = time.monotonic() - sent
+                    transfer.protocol = version
+
+                if status in REDIRECT_STATUS and "location" in headers:
+                    reusable = await self._readBody(reader, headers, lambda _: None, chunkSize)
+                    url = urljoin(url, headers["location"])
+                elif status != 200:
+                    raise HttpError(f"HTTP {status}: {url}")
+                else:
+                    reusable = await self._readBody(reader, headers, sink, chunkSize)
+                reusable = reusable and version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            except BaseException:
+                writer.close()
+                raise
+            self._release(key, reader, writer, reusable)
+            if status == 200: return
+        raise HttpError(f"重定向次数过多: {url}")
+
+    def close(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+
+    async def aclose(self):
+        self.close()
+
+
+class AsyncDownloader:
+    """
+    异步引擎的单文件下载: 作为协程任务交给全局调度器, 在调度线程的事件循环中执行,
+    并发预算、按目标路径去重与优先级都由调度器负责; 同一个下载器的任务共用一个客户端的长连接
+    """
+
+    def __init__(self, timeout: float = 10, retries: int = 3, chunkSize: int = 65536, index: FileIndex = None,
+                 router: OriginRouter = None, limiter: AdaptiveConcurrency = None, throttle: TokenBucket = None,
+                 store: ObjectStore = None, http2: bool = False):
+        """
+        :param limiter: 自适应并发控制, 记录每次请求的结果
+        :param throttle: 全局带宽限制
+        :param store: 全局对象库, 已有的对象直接链接, 新下载的文件收入库中
+        :param http2: 使用 HTTP/2 客户端 (需要 httpx[http2]), 源不支持时自动回退到 HTTP/1.1
+        """
+        self.limiter = limiter
+        self.throttle = throttle
+        self.index = index
+        self.store = store
+        self.router = router
+        self.timeout = timeout
+        self.retries = retries
+        self.chunkSize = chunkSize
+        self.http2 = http2
+        self._client = None
+
+    @property
+    def client(self):
+        """首次在事件循环中使用时创建客户端"""
+        if self._client is None:
+            if self.http2:
+                from .http2 import Http2Client     # 可选依赖, 启用时才导入
+                self._client = Http2Client(self.timeout, throttle=self.throttle)
+            else:
+                self._client = AsyncHttpClient(self.timeout, throttle=self.throttle)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None: await self._client.aclose()
+        self._client = None
+
+    async def download(self, url: str, path: Path, sha1: str = None, size: int = None, progress: Progress = None,
+                       state: list[Transfer] = None) -> tuple[bool, str]:
+        """
+        执行一次尝试, 失败且可以重试时抛出 RetryLater 交给调度器退避后重新排队;
+        state 保存跨越多次重试的 Transfer, 返回 (是否成功, 文件名)
+        """
+        if state is None: state = []
+        if not state: state.append(Transfer(url, str(path), size=size))
+        transfer = state[0]
+        currentTransfer.set(transfer)     # 每个协程任务有独立的上下文, 只影响本任务
+        ok = await self._downloadOnce(self.client, url, path, sha1, size, transfer, progress)
+        transfer.finish()
+        if progress:
+            seconds = transfer.total
+            if ok is None: progress.skip(size, seconds)
+            elif ok: progress.complete(seconds)
+            else: progress.fail(seconds)
+            progress.record(transfer)
+        return ok is not False, path.name
+
+    async def _downloadOnce(self, client: AsyncHttpClient, url: str, path: Path, sha1: str, size: int,
+                            transfer: Transfer, progress: Progress = None) -> bool | None:
+        """返回 None 表示文件已存在而跳过"""
+        check = self.index.verify if self.index else lambda p, h: fileSha1(p) == h
+        def verify(p: Path, h: str) -> bool:
+            verifyStart = time.monotonic()
+            try:
+                return check(p, h)
+            finally:
+                transfer.verify += time.monotonic() - verifyStart
+
+        if path.exists() and sha1 and (size is None or path.stat().st_size == size):
+            # 命中索引只需一次 stat, 未命中才放到线程里计算哈希
+            if (self.index and self.index.lookup(path) == sha1) or await asyncio.to_thread(verify, path, sha1):
+                if self.store: await asyncio.to_thread(self.store.adopt, path, sha1)
+                transfer.status = "skip"
+                return None
+        if sha1 and self.store and await asyncio.to_thread(self.store.place, sha1, path, size, verify):
+            if self.index: self.index.record(path, sha1)
+            transfer.status = "link"
+            return None
+        if self.retries <= 0: return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        start = time.monotonic()
+        try:
+            if self.router: transfer.origin = await self._fetchRouted(client, url, path, sha1, size, progress)
+            else: await self._fetch(client, url, path, sha1, size, progress)
+            if self.limiter: self.limiter.record(True, time.monotonic() - start, size or 0)
+            retryBudget.success(url)
+            if self.index and sha1: self.index.record(path, sha1)
+            if self.store and sha1: await asyncio.to_thread(self.store.adopt, path, sha1)
+            transfer.status = "ok"
+            return True
+        except Exception as e:
+            if self.limiter: self.limiter.record(False)
+            transfer.error = f"{type(e).__name__}: {e}"
+        if transfer.retries + 1 < self.retries and retryBudget.allow(url):
+            transfer.retries += 1
+            raise RetryLater(backoff(transfer.retries))
+        return False
+
+    async def _fetchTimed(self, client: AsyncHttpClient, name: str, url: str, path: Path, sha1: str, size: int,
+                          progress: Progress = None):
+        start = time.monotonic()
+        try:
+            await self._fetch(client, url, path, sha1, size, progress)
+        except Exception:
+            self.router.record(name, False)
+            raise
+        self.router.record(name, True, time.monotonic() - start, size or 0)
+
+    async def _fetchRouted(self, client: AsyncHttpClient, url: str, path: Path, sha1: str, size: int,
+                           progress: Progress = None) -> str:
+        """在最优源下载, 超过对冲时间仍未完成时同时向次优源请求, 先完成者胜出, 返回胜出的源"""
+        candidates = self.router.candidates(url)
+        name, target = candidates[0]
+        primary = asyncio.create_task(self._fetchTimed(client, name, target, path, sha1, size, progress))
+        if len(candidates) < 2 or (size is not None and size > self.router.hedgeMaxSize):
+            await primary
+            return name
+        done, _ = await asyncio.wait({primary}, timeout=self.router.hedgeDelay(name))
+        if done:
+            primary.result()
+            return name
+
+        hedgeName, hedgeTarget = candidates[1]
+        hedge = asyncio.create_task(self._fetchTimed(client, hedgeName, hedgeTarget, path, sha1, size, progress))
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending: other.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    return hedgeName if task is hedge else name
+                error = task.exception()
+        raise error
+
+    async def _fetch(self, client: AsyncHttpClient, url: str, path: Path, sha1: str, size: int, progress: Progress = None):
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+        try:
+            digest = hashlib.sha1()
+            received = 0
+            with os.fdopen(fd, "wb") as f:
+                def sink(data: bytes):
+                    nonlocal received
+                    f.write(data)
+                    digest.update(data)
+                    received += len(data)
+                    if (transfer := currentTransfer.get()) is not None: transfer.bytes += len(data)
+                    if progress: progress.addBytes(len(data))
+                await client.get(url, sink, self.chunkSize)
+            if size is not None and received != size: raise ValueError(f"文件大小不匹配 ({received}/{size})")
+            if sha1 and digest.hexdigest() != sha1: raise ValueError("SHA1 值不匹配")
+            os.replace(tmp, path)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError) and received:
+                # 对冲中落败被取消的请求不计入进度, 只算胜出者的字节
+                if (transfer := currentTransfer.get()) is not None: transfer.bytes -= received
+                if progress: progress.addBytes(-received)
+            try: os.unlink(tmp)
+            except OSError: ...
+            raise
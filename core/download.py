@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Event, Lock
+from typing import Callable
+
+import requests
+
+
+class Cancelled(Exception):
+    """下载被取消 (如对冲请求已在其他源完成)"""
+
+
+def fileSha1(path: Path) -> str:
+    """计算文件哈希值"""
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        while ...:
+            data = f.read(65536)    # 64 KB
+            if not data: break
+            sha1.update(data)
+    return sha1.hexdigest()
+
+
+RESUME_MIN_SIZE = 1 << 20  # 不小于 1 MB 的文件 (或大小未知) 使用 .part 断点续传
+
+_partLocks: set[str] = set()
+_partLocksLock = Lock()
+
+
+class RangeUnsupported(Exception):
+    """服务器不支持 Range 请求"""
+
+
+def fetchFile(session: requests.Session, url: str, path: Path, sha1: str = None, size: int = None,
+              timeout: float = 10, chunkSize: int = 262144, cancel: Event = None,
+              segments: int = 1, segmentMinSize: int = 8 << 20, onBytes: Callable[[int], None] = None):
+    """
+    流式下载并边写边算 SHA1, 校验通过后原子替换目标文件
+    :param segments: 大小不小于 segmentMinSize 的文件拆分为多少段并行下载
+    :param onBytes: 每写入一块数据时以块大小回调, 用于进度统计
+    """
+    if size is None or size >= RESUME_MIN_SIZE:
+        # 同一文件的 .part 同时只能有一个写入者, 其余 (如对冲请求) 退回临时文件下载
+        key = os.path.abspath(path)
+        with _partLocksLock:
+            locked = key not in _partLocks
+            if locked: _partLocks.add(key)
+        if locked:
+            try:
+                if segments > 1 and size is not None and size >= segmentMinSize:
+                    try:
+                        return fetchFileSegmented(
+                            session, url, path, sha1, size, timeout, chunkSize, cancel, segments, onBytes
+                        )
+                    except RangeUnsupported: ...
+                return fetchFileResumable(session, url, path, sha1, size, timeout, chunkSize, cancel, onBytes)
+            finally:
+                with _partLocksLock: _partLocks.discard(key)
+
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        digest = hashlib.sha1()
+        received = 0
+        with os.fdopen(fd, "wb") as f, session.get(url, stream=True, timeout=timeout) as resp:
+            resp.raise_for_status()
+            for chunk in resp.iter_content(chunk_size=chunkSize):
+                if cancel is not None and cancel.is_set(): raise Cancelled(path.name)
+                f.write(chunk)
+                digest.update(chunk)
+                received += len(chunk)
+                if onBytes: onBytes(len(chunk))
+        if size is not None and received != size: raise ValueError(f"文件大小不匹配 ({received}/{size})")
+        if sha1 and digest.hexdigest() != sha1: raise ValueError("SHA1 值不匹配")
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: ...
+        raise
+
+
+def fetchFileResumable(session: requests.Session, url: str, path: Path, sha1: str = None, size: int = None,
+                       timeout: float = 10, chunkSize: int = 262144, cancel: Event = None,
+                       onBytes: Callable[[int], None] = None):
+    """
+    断点续传下载: 已接收的数据保存在 <文件名>.part, 元数据保存在 <文件名>.part.json,
+    重试时用 Range 请求从断点继续, 全部接收完成后才校验 SHA1 并替换目标文件
+    """
+    part = path.with_name(path.name + ".part")
+    meta = path.with_name(path.name + ".part.json")
+    try:
+        info = json.loads(meta.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        info = {}
+    # 元数据与本次下载的文件不一致时丢弃已有数据, 没有 SHA1 时还要求地址相同
+    same = info.get("sha1") == sha1 and info.get("size") == size and (sha1 or info.get("url") == url) \
+        and "ranges" not in info
+    offset = part.stat().st_size if same and part.exists() else 0
+    total = size or info.get("total")
+    if total is not None and offset > total:
+        # 已接收的数据比文件还长, 断点不可用, 从头下载
+        part.unlink(missing_ok=True)
+        meta.unlink(missing_ok=True)
+        offset = 0
+
+    headers = {"Accept-Encoding": "identity"}
+    if offset and offset == total:
+        headers = None  # 上次已接收完整, 直接校验
+    elif offset:
+        headers["Range"] = f"bytes={offset}-"
+        # 没有 SHA1 可校验时依赖服务器验证器保证续传的是同一份内容
+        if sha1 is None and (validator := info.get("etag") or info.get("lastModified")):
+            headers["If-Range"] = validator
+
+    digest = hashlib.sha1()
+    if headers is not None:
+        resp = session.get(url, headers=headers, stream=True, timeout=timeout)
+        if resp.status_code == 416 and offset:
+            # 断点超出服务器上的文件长度 (文件已变化), 清除断点后从头下载
+            resp.close()
+            part.unlink(missing_ok=True)
+            meta.unlink(missing_ok=True)
+            return fetchFileResumable(session, url, path, sha1, size, timeout, chunkSize, cancel, onBytes)
+        with resp:
+            resp.raise_for_status()
+            contentRange = resp.headers.get("Content-Range", "")
+            if resp.status_code != 206 or not contentRange.startswith(f"bytes {offset}-"):
+                offset = 0  # 服务器忽略了 Range 或内容已变化, 从头开始
+            if total is None:
+                length = contentRange.rpartition("/")[2] if offset else resp.headers.get("Content-Length", "")
+                total = int(length) if length.isdigit() else None
+            meta.write_text(json.dumps({
+                "url": url, "sha1": sha1, "size": size, "total": total,
+                "etag": resp.headers.get("ETag"), "lastModified": resp.headers.get("Last-Modified")
+            }), encoding="utf-8")
+            with open(part, "r+b" if offset else "wb") as f:
+                # 续传时只需重读已接收部分计算哈希
+                while offset and (data := f.read(min(65536, offset - f.tell()))):
+                    digest.update(data)
+                f.seek(offset)
+                f.truncate()
+                for chunk in resp.iter_content(chunk_size=chunkSize):
+                    if cancel is not None and cancel.is_set(): raise Cancelled(path.name)
+                    f.write(chunk)
+                    digest.update(chunk)
+                    if onBytes: onBytes(len(chunk))
+    else:
+        with open(part, "rb") as f:
+            while data := f.read(65536):
+                digest.update(data)
+
+    received = part.stat().st_size
+    if total is not None and received < total: raise ValueError(f"文件未接收完整 ({received}/{total})")
+    if (total is not None and received != total) or (sha1 and digest.hexdigest() != sha1):
+        # 数据损坏, 清除断点下次从头下载
+        part.unlink(missing_ok=True)
+        meta.unlink(missing_ok=True)
+        raise ValueError("SHA1 值不匹配" if total is None or received == total else f"文件大小不匹配 ({received}/{total})")
+    os.replace(part, path)
+    meta.unlink(missing_ok=True)
+
+
+def fetchFileSegmented(session: requests.Session, url: str, path: Path, sha1: str | None, size: int,
+                       timeout: float = 10, chunkSize: int = 262144, cancel: Event = None, segments: int = 4,
+                       onBytes: Callable[[int], None] = None):
+    """
+    分段并行下载: 预分配 <文件名>.part, 各段用独立连接按 Range 写入各自偏移,
+    每段进度记录在 <文件名>.part.json 中以便断点续传, 全部完成后校验 SHA1
+    """
+    part = path.with_name(path.name + ".part")
+    meta = path.with_name(path.name + ".part.json")
+    try:
+        info = json.loads(meta.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        info = {}
+    if info.get("sha1") == sha1 and info.get("size") == size and info.get("ranges") and part.exists():
+        ranges = info["ranges"]     # [[起始, 结束(含), 已接收], ...]
+    else:
+        step = -(-size // segments)
+        ranges = [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+        with open(part, "wb") as f:
+            if hasattr(os, "posix_fallocate"): os.posix_fallocate(f.fileno(), 0, size)
+            else: f.truncate(size)
+    lock = Lock()
+
+    def save():
+        with lock:
+            meta.write_text(json.dumps({"url": url, "sha1": sha1, "size": size, "ranges": ranges}), encoding="utf-8")
+
+    def download(segment: list):
+        start, end, done = segment
+        if start + done > end: return
+        headers = {"Accept-Encoding": "identity", "Range": f"bytes={start + done}-{end}"}
+        with session.get(url, headers=headers, stream=True, timeout=timeout) as resp, open(part, "r+b") as f:
+            resp.raise_for_status()
+            if resp.status_code != 206 or not resp.headers.get("Content-Range", "").startswith(f"bytes {start + done}-"):
+                raise RangeUnsupported(url)
+            f.seek(start + done)
+            unsaved = 0
+            for chunk in resp.iter_content(chunk_size=chunkSize):
+                if cancel is not None and cancel.is_set(): raise Cancelled(path.name)
+                data = chunk[:end + 1 - start - segment[2]]
+                f.write(data)
+                with lock: segment[2] += len(data)
+                if onBytes: onBytes(len(data))
+                unsaved += len(chunk)
+                if unsaved >= 4 << 20:  # 每 4 MB 落盘一次进度
+                    f.flush()
+                    save()
+                    unsaved = 0
+        if start + segment[2] <= end: raise ValueError(f"分段未接收完整 ({start}-{end})")
+
+    save()
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            for future in [executor.submit(download, segment) for segment in ranges]:
+                future.result()
+    except RangeUnsupported:
+        part.unlink(missing_ok=True)
+        meta.unlink(missing_ok=True)
+        raise
+    finally:
+        if meta.exists(): save()
+
+    if sha1 and fileSha1(part) != sha1:
+        part.unlink(missing_ok=True)
+        meta.unlink(missing_ok=True)
+        raise ValueError("SHA1 值不匹配")
+    os.replace(part, path)
+    meta.unlink(missing_ok=True)
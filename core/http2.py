@@ -0,0 +1,56 @@
+import asyncio
+import time
+from importlib.util import find_spec
+from typing import Callable
+
+from .aio import HttpError
+from .telemetry import currentTransfer
+from .throttle import TokenBucket
+
+
+def http2Available() -> bool:
+    """是否安装了 httpx 与 h2 (pip install httpx[http2]), 只查找不导入, httpx 导入较慢"""
+    return find_spec("httpx") is not None and find_spec("h2") is not None
+
+
+class Http2Client:
+    """
+    基于 httpx 的 HTTP/2 客户端, 接口与 AsyncHttpClient 相同 (仅 GET):
+    每个 h2 源只建立一条连接, 大量小文件请求作为并发流在连接上多路复用;
+    源未通过 ALPN 协商 h2 (或为明文 http) 时 httpx 自动使用 HTTP/1.1
+    """
+
+    def __init__(self, timeout: float = 10, connections: int = 16, streams: int = 128, maxRedirects: int = 5,
+                 userAgent: str = "MinecraftLauncherDemo", throttle: TokenBucket = None):
+        """
+        :param connections: 连接总数上限, 对 h2 源只在流数达到服务器限制时才新建连接, 也是回退到 HTTP/1.1 时的连接数
+        :param streams: 同时进行的请求数上限; httpx 连接池每次调度都要遍历排队的请求, 排队过多时 CPU 开销明显
+        """
+        if not http2Available(): raise RuntimeError("HTTP/2 需要安装 httpx[http2]")
+        import httpx
+        self.throttle = throttle
+        self._streams = asyncio.Semaphore(streams)
+        self._client = httpx.AsyncClient(
+            http2=True, timeout=timeout, follow_redirects=True, max_redirects=maxRedirects,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+            headers={"User-Agent": userAgent, "Accept-Encoding": "identity"}
+        )
+
+    async def get(self, url: str, sink: Callable[[bytes], None], chunkSize: int = 65536):
+        """GET 请求并把响应体分块交给 sink, 自动跟随重定向"""
+        async with self._streams:
+            await self._get(url, sink, chunkSize)
+
+    async def _get(self, url: str, sink: Callable[[bytes], None], chunkSize: int):
+        sent = time.monotonic()
+        async with self._client.stream("GET", url) as resp:
+            if (transfer := currentTransfer.get()) is not None:
+                transfer.ttfb = time.monotonic() - sent
+                transfer.protocol = resp.http_version
+            if resp.status_code != 200: raise HttpError(f"HTTP {resp.status_code}: {url}")
+            async for chunk in resp.aiter_raw(chunkSize):
+                sink(chunk)
+                if self.throttle and (delay := self.throttle.reserve(len(chunk))) > 0: await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -0,0 +1,104 @@
+import atexit
+import os
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+
+from .download import fileSha1
+
+COMMIT_EVERY = 256      # 累计多少条记录提交一次
+COMMIT_INTERVAL = 1.0   # 距上次提交超过该秒数时提交 (秒)
+
+
+class FileIndex:
+    """已校验文件索引: 路径 -> (大小, mtime, SHA1), stat 未变化的文件无需重新计算哈希"""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, sha1 TEXT)"
+        )
+        self._db.commit()
+        self._pending = 0
+        self._committed = time.monotonic()
+
+    def lookup(self, path: Path) -> str | None:
+        """stat 与索引记录一致时返回记录的 SHA1"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime, sha1 FROM files WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        return None
+
+    def record(self, path: Path, sha1: str):
+        st = os.stat(path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (os.path.abspath(path), st.st_size, st.st_mtime_ns, sha1)
+            )
+            # 批量提交: 每个文件都提交会让每次写入都等一次磁盘同步
+            self._pending += 1
+            if self._pending >= COMMIT_EVERY or time.monotonic() - self._committed >= COMMIT_INTERVAL: self._commit()
+
+    def _commit(self):
+        """调用方需持有锁"""
+        self._db.commit()
+        self._pending = 0
+        self._committed = time.monotonic()
+
+    def flush(self):
+        """提交尚未提交的记录"""
+        with self._lock:
+            if self._pending: self._commit()
+
+    def entries(self, root: Path) -> dict[str, tuple[int, int, str]]:
+        """一次查询取出 root 目录下的全部记录: 绝对路径 -> (大小, mtime, SHA1)"""
+        prefix = os.path.join(os.path.abspath(root), "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)     # 按主键范围查询, 无需逐个文件查询
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path, size, mtime, sha1 FROM files WHERE path >= ? AND path < ?", (prefix, upper)
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def verify(self, path: Path, sha1: str) -> bool:
+        """校验文件哈希, 命中索引时不读取文件内容"""
+        if self.lookup(path) == sha1: return True
+        if fileSha1(path) != sha1: return False
+        self.record(path, sha1)
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._pending: self._commit()
+            self._db.close()
+
+
+_indexes: dict[str, FileIndex] = {}
+_indexesLock = Lock()
+
+
+def openFileIndex(path: Path) -> FileIndex:
+    """按数据库路径共享 FileIndex 实例"""
+    key = os.path.abspath(path)
+    with _indexesLock:
+        if key not in _indexes:
+            _indexes[key] = FileIndex(Path(key))
+        return _indexes[key]
+
+
+@atexit.register
+def _closeIndexes():
+    """退出时提交所有索引中尚未提交的记录"""
+    with _indexesLock:
+        for index in _indexes.values(): index.close()
+        _indexes.clear()
@@ -0,0 +1,419 @@
+import json
+import re
+import time
+from concurrent.futures import Future, as_completed, wait
+from dataclasses import dataclass
+from pathlib import Path
+
+from .aio import AsyncDownloader
+from .download import Cancelled, fetchFile, fileSha1
+from .http2 import http2Available
+from .index import openFileIndex
+from .launch import preparePlan
+from .library import Artifact, libraryArtifacts, mirrorUrl, mirrorMetaUrl
+from .origin import OriginRouter
+from .plan import planDownloads
+from .progress import Progress
+from .retry import RetryLater, backoff, retryBudget
+from .scheduler import Scheduler, scheduler as globalScheduler
+from .session import sessions
+from .store import ObjectStore
+from .telemetry import Transfer, Trace, currentTransfer
+from .throttle import bandwidth
+
+
+@dataclass(slots=True)
+class InstallOptions:
+    minecraftPath: Path
+    origin: str = "Official"            # 下载源名称
+    officialOrigin: str = "Official"    # 官方源名称, 用于把依赖库地址替换为镜像地址
+    threads: int = 16                   # 全局并发预算 (线程引擎), 所有安装共用; 自适应时为上限
+    adaptive: bool = False              # 按吞吐 / 出错率 / 延迟自动调整并发数
+    bandwidthLimit: float = 0           # 全局带宽上限 (字节/秒), 0 表示不限
+    timeout: float = 10
+    retries: int = 3
+    engine: str = "Thread"              # Thread / Asyncio
+    asyncTasks: int = 256               # 异步引擎的全局并发预算, 普通任务仍最多使用 threads 个线程
+    originRace: bool = False
+    segments: int = 4
+    segmentMinSize: int = 8 << 20
+    indexPath: Path | None = None       # 已校验文件索引, 为空时不使用索引
+    metaCachePath: Path | None = None   # 版本 JSON / 资源索引缓存目录 (按 SHA1 存放), 为空时不缓存
+    storePath: Path | None = None       # 多个实例共用的全局对象库目录, 为空时不使用
+    http2: bool = False                 # 资源文件用 HTTP/2 多路复用下载, 只替换客户端, 调度不变 (需要 httpx[http2])
+
+
+class InstallListener:
+    """安装过程回调, 默认不做任何事; 界面与命令行按需重写"""
+
+    def info(self, text: str):
+        ...
+
+    def fileInfo(self, text: str):
+        ...
+
+    def started(self, progress: Progress):
+        ...
+
+
+class Installer:
+    """不依赖 Qt 的版本安装引擎, 下载版本 JSON / 依赖库 / 客户端 / 资源文件"""
+
+    def __init__(self, origins: dict, options: InstallOptions, listener: InstallListener = None,
+                 router: OriginRouter = None, scheduler: Scheduler = None):
+        """
+        :param origins: 源名称 -> UrlOrigin
+        :param router: 多个安装共用同一个路由器以保留测速结果, 为空时按需创建
+        :param scheduler: 下载调度器, 默认使用进程内全局调度器, 并发安装共享同一并发预算并合并相同文件
+        """
+        self.origins = origins
+        self.options = options
+        self.listener = listener or InstallListener()
+        self.router = (router or OriginRouter(origins)) if options.originRace else None
+        self.index = openFileIndex(Path(options.indexPath)) if options.indexPath else None
+        self.store = ObjectStore(options.storePath) if options.storePath else None
+        self.scheduler = scheduler or globalScheduler
+        budget = options.asyncTasks if options.engine == "Asyncio" else options.threads
+        self.scheduler.configure(budget, options.adaptive, options.threads)
+        bandwidth.setRate(options.bandwidthLimit)
+
+    @property
+    def origin(self):
+        return self.origins[self.options.origin]
+
+    def session(self, name: str = None):
+        return sessions.get(name or self.options.origin, self.options.threads)
+
+    def install(self, ver: str, url: str, sha1: str = None) -> Progress:
+        """
+        阻塞安装一个版本, 返回结束后的进度计数器; 安装出错时记为失败, 不向外抛出
+        :param sha1: 版本 JSON 的 SHA1 (版本清单 v2 提供), 为空时从地址中解析
+        """
+        baseDir = Path(self.options.minecraftPath)
+        versionDir = baseDir / "versions" / ver
+        assetsDir = baseDir / "assets"
+        librariesDir = baseDir / "libraries"
+
+        progress = Progress(Trace(ver))
+        trace = progress.trace
+        self.listener.started(progress)
+        try:
+            if self.options.originRace:
+                with trace.span("下载源测速", "network"):
+                    self.router.probe(self.session, self.options.timeout)
+                self.listener.info(f"📡 下载源测速: {' > '.join(self.router.ranked())}")
+
+            self.listener.info(f"📁 创建目录结构: {ver}")
+            versionDir.mkdir(parents=True, exist_ok=True)
+            assetsDir.mkdir(parents=True, exist_ok=True)
+            librariesDir.mkdir(parents=True, exist_ok=True)
+
+            with trace.span(f"安装 {ver}"):
+                self._install(ver, url, sha1 or url.split("/")[-2], versionDir, assetsDir, librariesDir, progress)
+        except Exception as e:     # 单个版本失败计入失败数, 不影响后续版本
+            self.listener.info(f"❌ 安装 {ver} 失败: {type(e).__name__}: {e}")
+            if not progress.snapshot().failed: progress.fail()     # 下载失败时已经计过数
+        finally:
+            if self.index: self.index.flush()
+            progress.finish()
+        return progress
+
+    def _install(self, ver: str, url: str, sha1: str, versionDir: Path, assetsDir: Path, librariesDir: Path, progress: Progress):
+        trace = progress.trace
+        self.listener.info(f"⬇️ 下载版本JSON文件: {url}")
+        progress.stage = "版本文件下载 (1/4)"
+        progress.addTotal(1)
+        with trace.span("版本 JSON", "network"):
+            verData = json.loads(self.fetchMeta(self.metaUrl(url), versionDir / f"{ver}.json", sha1, progress=progress))
+
+        # 依赖库与客户端/资源文件一起排队, 由调度器按优先级执行
+        artifacts = libraryArtifacts(verData.get("libraries", []))
+        progress.addTotal(len(artifacts), sum(artifact.size or 0 for artifact in artifacts))
+        libraryFutures = self.submitLibraries(artifacts, librariesDir, progress)
+
+        _client = verData['downloads']['client']
+        progress.stage = "客户端下载 (2/4)"
+        progress.addTotal(1, _client["size"])
+        self.listener.info(f"⬇️ 下载客户端JAR: {ver}.jar")
+        clientFuture = self.submitFile(
+            self.metaUrl(_client["url"]), versionDir / f"{ver}.jar", _client["sha1"], size=_client["size"], progress=progress,
+            priority=Scheduler.CLIENT
+        )
+
+        assetIndex = verData["assetIndex"]
+        assetIndexPath = assetsDir / "indexes" / f"{assetIndex['id']}.json"
+        assetIndexPath.parent.mkdir(parents=True, exist_ok=True)
+        progress.stage = "资源索引下载 (3/4)"
+        progress.addTotal(1, assetIndex["size"])
+        self.listener.info(f"⬇️ 下载资源索引: {assetIndex['url']}")
+        with trace.span("资源索引", "network"):
+            assetIndexData: dict = json.loads(self.fetchMeta(
+                self.metaUrl(assetIndex["url"]), assetIndexPath, assetIndex["sha1"], assetIndex["size"], progress
+            ))["objects"]
+
+        self.listener.info(f"⬇️ 开始下载资源文件")
+        progress.stage = "资源文件下载 (4/4)"
+        progress.addTotal(len(assetIndexData), sum(data["size"] for data in assetIndexData.values()))
+
+        assetsBase = str(self.origin.Assets).rstrip("/")
+        tasks = [(
+            f"{assetsBase}/{data['hash'][:2]}/{data['hash']}",
+            assetsDir / "objects" / data["hash"][:2] / data["hash"],
+            data["hash"],
+            data["size"]
+        ) for data in assetIndexData.values()]
+        tasks = self.plan(tasks, assetsDir / "objects", progress, "资源文件")
+
+        http2 = self.options.http2 and http2Available()
+        if self.options.http2 and not http2: self.listener.info("⚠️ 未安装 httpx[http2], 资源文件使用 HTTP/1.1 下载")
+        with trace.span("资源文件", "network"):
+            # HTTP/2 客户端是异步的, 所以以协程任务执行; 并发预算仍由引擎决定 (线程引擎为 threads),
+            # 与其他任务一样经过调度器的优先级与按目标路径合并, 选择传输协议不改变调度方式
+            if self.options.engine == "Asyncio" or http2:
+                # 请求结果计入调度器的自适应控制器, 与线程任务共用同一个全局并发上限
+                downloader = AsyncDownloader(
+                    self.options.timeout, self.options.retries, index=self.index, router=self.router,
+                    limiter=self.scheduler.adaptive, throttle=bandwidth, store=self.store, http2=http2
+                )
+                futures = [self.submitAsync(downloader, *task, progress=progress) for task in tasks]
+                try:
+                    self.waitAll(futures)
+                finally:
+                    wait(futures)
+                    self.scheduler.run(downloader.aclose()).result()
+            else:
+                self.waitAll(self.submitAll(tasks, progress, Scheduler.ASSET))
+
+        self.listener.info(f"✅ 资源文件下载完成")
+        with trace.span("等待客户端与依赖库", "network"):
+            self.waitAll([clientFuture])
+            self.waitAll(libraryFutures)
+        self.listener.info(f"✅ 依赖库下载完成")
+
+        progress.stage = "准备启动文件"
+        # 由启动参数记录的 stat 判断: 没有文件被重新下载时直接沿用, 有变化时才重建并解压变化的 natives
+        with trace.span("生成启动参数", "disk"):
+            prepared = preparePlan(versionDir.parent.parent, ver, librariesDir, assetsDir)
+        if prepared.extract is not None: self.listener.info(f"📦 解压本地库: {prepared.extract}")
+        if prepared.state == "cached": self.listener.info(f"✅ 启动参数无变化: {ver}.launch.json")
+        else: self.listener.info(f"✅ 已生成启动参数: {ver}.launch.json")
+
+    def metaUrl(self, url: str) -> str:
+        """
+        版本 JSON / 资源索引 / 客户端 JAR 的地址换到当前下载源 (镜像源与局域网缓存以相同路径提供);
+        多源竞速时保持官方地址, 由路由器选择
+        """
+        if self.options.originRace or self.options.origin == self.options.officialOrigin: return url
+        return mirrorMetaUrl(url, str(self.origin.Versions))
+
+    def metaPath(self, sha1: str | None) -> Path | None:
+        """版本 JSON / 资源索引在缓存中的路径, 未启用缓存或 SHA1 未知时为 None"""
+        if not self.options.metaCachePath or not sha1 or not re.fullmatch(r"[0-9a-f]{40}", sha1): return None
+        return Path(self.options.metaCachePath) / sha1[:2] / f"{sha1}.json"
+
+    def fetchMeta(self, url: str, path: Path, sha1: str = None, size: int = None, progress: Progress = None) -> bytes:
+        """
+        获取版本 JSON / 资源索引并写入 path, 返回文件内容;
+        缓存中已有 (或正在预取) 时直接使用, 不再等待一次完整的网络往返
+        """
+        if (cached := self.metaPath(sha1)) is None:
+            ok, name = self.downloadFile(url, path, sha1, size=size, progress=progress, priority=Scheduler.META)
+            if not ok: raise RuntimeError(f"下载 {name} 失败")
+            return path.read_bytes()
+        # 与预取共用同一目标路径: 预取仍在排队时提升为最高优先级, 正在下载时共享那次传输
+        ok, name = self.submitFile(url, cached, sha1, False, size, progress, Scheduler.META).result()
+        if not ok: raise RuntimeError(f"下载 {name} 失败")
+        data = cached.read_bytes()
+        if not path.exists() or path.stat().st_size != len(data) or path.read_bytes() != data:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        return data
+
+    def prefetch(self, versions: list[tuple[str, str]]):
+        """
+        以最低优先级把 (地址, SHA1) 对应的版本 JSON 及其资源索引下载到缓存, 不阻塞调用方;
+        未启用缓存或 SHA1 未知的版本跳过
+        """
+        def prefetchAssetIndex(future: Future, path: Path):
+            try:
+                if not future.result()[0]: return
+                assetIndex = json.loads(path.read_bytes())["assetIndex"]
+            except Exception:
+                return
+            if (cached := self.metaPath(assetIndex.get("sha1"))) and not cached.exists():
+                self.submitFile(self.metaUrl(assetIndex["url"]), cached, assetIndex["sha1"], False, assetIndex.get("size"),
+                                priority=Scheduler.PREFETCH)
+
+        for url, sha1 in versions:
+            if (cached := self.metaPath(sha1)) is None: continue
+            future = self.submitFile(self.metaUrl(url), cached, sha1, False, priority=Scheduler.PREFETCH)
+            future.add_done_callback(lambda f, path=cached: prefetchAssetIndex(f, path))
+
+    def submitAll(self, tasks: list[tuple[str, Path, str, int]], progress: Progress = None,
+                  priority: int = Scheduler.ASSET) -> list[Future]:
+        """把 (url, 路径, SHA1, 大小) 任务列表提交给调度器"""
+        return [self.submitFile(url, path, sha1, False, size, progress, priority) for url, path, sha1, size in tasks]
+
+    def waitAll(self, futures: list[Future]):
+        for future in as_completed(futures):
+            if not future.result()[0]:
+                self.listener.info(f"❌ 下载文件 {future.result()[1]} 时发生错误")
+
+    def submitLibraries(self, artifacts: list[Artifact], librariesDir: Path, progress: Progress = None) -> list[Future]:
+        """提交依赖库下载, 已存在且 SHA1 一致的文件直接跳过"""
+        self.listener.info(f"⬇️ 开始下载依赖库 ({len(artifacts)})")
+        official = str(self.origins[self.options.officialOrigin].Library)
+        mirror = str(self.origin.Library)
+        tasks = [(
+            mirrorUrl(artifact.url, official, mirror), librariesDir / artifact.path, artifact.sha1, artifact.size
+        ) for artifact in artifacts]
+        return self.submitAll(self.plan(tasks, librariesDir, progress, "依赖库"), progress, Scheduler.LIBRARY)
+
+    def plan(self, tasks: list[tuple[str, Path, str, int]], root: Path, progress: Progress = None,
+             name: str = "") -> list[tuple[str, Path, str, int]]:
+        """
+        计划阶段: 扫描一次 root 并与索引比对, 已确认存在的文件直接计入跳过,
+        返回仍需下载或校验的任务
+        """
+        start = time.monotonic()
+        plan = planDownloads(tasks, root, self.index)
+        if progress and progress.trace: progress.trace.addSpan(f"计划: {name}", "disk", start, time.monotonic())
+        if progress: progress.skipMany(plan.present, plan.presentBytes)
+        self.listener.info(f"📋 {name}: {plan}")
+        return plan.tasks
+
+    def submitFile(self, url: str, path: Path, sha1: str = None, su: bool = True, size: int = None,
+                   progress: Progress = None, priority: int = Scheduler.ASSET) -> Future:
+        """按目标路径合并: 其他安装正在下载同一文件时共享那次传输"""
+        path = Path(path)
+        state = []      # 首次执行时创建的 Transfer, 跨越多次重试
+        return self.scheduler.submit(
+            str(path.absolute()), lambda shared: self._downloadFile(url, path, sha1, su, size, shared, state),
+            priority, progress
+        )
+
+    def submitAsync(self, downloader: AsyncDownloader, url: str, path: Path, sha1: str = None, size: int = None,
+                    progress: Progress = None, priority: int = Scheduler.ASSET) -> Future:
+        """异步引擎: 以协程任务提交, 与 submitFile 共用同一个按目标路径合并的任务表"""
+        path = Path(path)
+        state = []
+        return self.scheduler.submit(
+            str(path.absolute()), lambda shared: downloader.download(url, path, sha1, size, shared, state),
+            priority, progress, coroutine=True
+        )
+
+    def downloadFile(self, url: str, path: Path, sha1: str = None, su: bool = True, size: int = None,
+                     progress: Progress = None, priority: int = Scheduler.META) -> tuple[bool, str]:
+        return self.submitFile(url, path, sha1, su, size, progress, priority).result()
+
+    def _downloadFile(self, url: str, path: Path, sha1: str = None, su: bool = True, size: int = None,
+                      progress: Progress = None, state: list[Transfer] = None) -> tuple[bool, str]:
+        """
+        执行一次尝试, 失败且可以重试时抛出 RetryLater 交给调度器退避后重新排队;
+        最终结束时记录传输的计时与结果, 交给进度所属安装的 Trace
+        """
+        if state is None: state = []
+        if not state: state.append(Transfer(str(url), str(path), self.options.origin, size))
+        transfer = state[0]
+        token = currentTransfer.set(transfer)
+        try:
+            result = self._transfer(url, path, sha1, su, size, progress, transfer)
+        finally:
+            currentTransfer.reset(token)
+        transfer.finish()
+        if progress: progress.record(transfer)
+        return result
+
+    def _transfer(self, url: str, path: Path, sha1: str, su: bool, size: int, progress: Progress,
+                  transfer: Transfer) -> tuple[bool, str]:
+        url = str(url)
+        path = Path(path)
+        options = self.options
+        session = self.session()
+        start = transfer.start
+
+        check = self.index.verify if self.index else lambda p, h: fileSha1(p) == h
+        def verify(p: Path, h: str) -> bool:
+            verifyStart = time.monotonic()
+            try:
+                return check(p, h)
+            finally:
+                transfer.verify += time.monotonic() - verifyStart
+
+        if path.exists():
+            if sha1:
+                # 已知哈希时信任索引, 大小不符直接重新下载, 无需 HEAD
+                if (size is None or path.stat().st_size == size) and verify(path, sha1):
+                    if self.store: self.store.adopt(path, sha1)
+                    transfer.status = "skip"
+                    if su: self.listener.fileInfo(f"   ✓ 下载完成: {path.name}")
+                    if progress: progress.skip(size, time.monotonic() - start)
+                    return True, path.name
+            else:
+                try:
+                    headResp = session.head(url, timeout=options.timeout)
+                    if headResp.status_code == 200:
+                        remote_size = int(headResp.headers.get('Content-Length', 0))
+                        if path.stat().st_size == remote_size:
+                            transfer.status = "skip"
+                            if su: self.listener.fileInfo(f"   ✓ 下载完成: {path.name}")
+                            if progress: progress.skip(remote_size, time.monotonic() - start)
+                            return True, path.name
+                except Exception: ...
+        if sha1 and self.store and self.store.place(sha1, path, size, verify):
+            # 对象库中已有: 只需建立链接, 不走网络
+            if self.index: self.index.record(path, sha1)
+            transfer.status = "link"
+            if su: self.listener.fileInfo(f"   ✓ 下载完成: {path.name}")
+            if progress: progress.skip(size, time.monotonic() - start)
+            return True, path.name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        def countBytes(n: int):
+            transfer.bytes += n
+            if progress: progress.addBytes(n)
+
+        def onBytes(n: int):
+            bandwidth.consume(n)
+            countBytes(n)
+
+        def attempt(name: str, target: str, cancel):
+            received = 0
+            def count(n: int):
+                nonlocal received
+                received += n
+                onBytes(n)
+            try:
+                fetchFile(self.session(name), target, path, sha1, size, options.timeout, cancel=cancel,
+                          **{**fetchOptions, "onBytes": count})
+            except Cancelled:
+                countBytes(-received)    # 对冲中落败被取消的请求不计入进度, 只算胜出者的字节
+                raise
+
+        fetchOptions = {"segments": options.segments, "segmentMinSize": options.segmentMinSize, "onBytes": onBytes}
+        adaptive = self.scheduler.adaptive
+
+        attemptStart = time.monotonic()
+        if options.retries > 0:
+            try:
+                if self.router:
+                    transfer.origin = self.router.fetch(url, attempt, size)
+                else:
+                    fetchFile(session, url, path, sha1, size, options.timeout, **fetchOptions)
+                if adaptive: adaptive.record(True, time.monotonic() - attemptStart, size or 0)
+                retryBudget.success(url)
+                if sha1 and self.index: self.index.record(path, sha1)
+                if sha1 and self.store: self.store.adopt(path, sha1)
+                transfer.status = "ok"
+                if su: self.listener.fileInfo(f"   ✓ 下载完成: {path.name}")
+                if progress: progress.complete(time.monotonic() - start)
+                return True, path.name
+            except Exception as e:
+                if adaptive: adaptive.record(False)
+                transfer.error = f"{type(e).__name__}: {e}"
+            # 不在工作线程里原地重试: 退避期间让出并发给其他文件, 主机失败过多时不再重试
+            if transfer.retries + 1 < options.retries and retryBudget.allow(url):
+                transfer.retries += 1
+                raise RetryLater(backoff(transfer.retries))
+        if progress: progress.fail(time.monotonic() - start)
+        return False, path.name
+
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import re
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from threading import Thread, Lock
+from urllib.parse import urlsplit, unquote
+
+from .manifest import MANIFEST_PATH, ManifestCache
+from .url import UrlOrigin, ORIGINS, LAN_PORT
+
+SHA1 = re.compile(r"[0-9a-f]{40}")
+OFFICIAL_DATA = "https://piston-data.mojang.com"    # 官方客户端 JAR 所在主机, 与版本 JSON 不同
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MinecraftLauncherDemo"
+    timeout = 30    # 空闲的长连接 30 秒后关闭, 避免占住线程
+
+    def log_message(self, *args):
+        ...
+
+    def do_HEAD(self):
+        self.do_GET(body=False)
+
+    def do_GET(self, body: bool = True):
+        cache: CacheServer = self.server.cache
+        path = unquote(urlsplit(self.path).path)
+        if path == MANIFEST_PATH and (manifest := cache.manifest()) is not None:
+            return self._sendBytes(*manifest, body)
+        file = cache.resolve(path)
+        if file is None:
+            if (location := cache.upstreamUrl(path)) is None: return self._empty(404)
+            cache.count(redirect=True)
+            self.send_response(302)     # 本机没有的文件让客户端直接去上游下载
+            self.send_header("Location", location)
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+
+        try:
+            f = open(file, "rb")
+        except OSError:
+            return self._empty(404)
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            start, end = 0, size - 1
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            # 结束位置小于起始位置的范围无效, 按 RFC 9110 忽略 Range 返回完整文件
+            if match and int(match[1]) < size and (not match[2] or int(match[2]) >= int(match[1])):
+                start, end = int(match[1]), min(int(match[2]) if match[2] else end, end)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+            if not body: return
+            try:
+                # 零拷贝: 内核直接把页缓存中的文件数据发送到套接字
+                sent = self.connection.sendfile(f, start, end - start + 1)
+            except OSError:
+                self.close_connection = True
+                return
+        cache.count(sent)
+
+    def _sendBytes(self, data: bytes, etag: str, body: bool):
+        if self.headers.get("If-None-Match") == etag: return self._empty(304, etag)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        if body: self.wfile.write(data)
+        self.server.cache.count(len(data) if body else 0)
+
+    def _empty(self, status: int, etag: str = None):
+        self.send_response(status)
+        if etag: self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class CacheServer:
+    """
+    局域网缓存服务器: 按下载源的地址布局 (与 BMCLAPI 相同) 提供本机已有的资源文件、依赖库、
+    版本 JSON / 资源索引 / 客户端 JAR 与版本清单, 文件用 sendfile 零拷贝发送;
+    本机没有的文件以 302 重定向到上游下载源, 其他启动器把它当作普通下载源使用即可
+    """
+
+    def __init__(self, minecraftPath: Path, metaCachePath: Path = None, manifestPath: Path = None,
+                 storePath: Path = None, upstream: UrlOrigin = None, host: str = "0.0.0.0", port: int = LAN_PORT):
+        """
+        :param metaCachePath: 按 SHA1 存放的版本 JSON / 资源索引缓存目录
+        :param manifestPath: 版本清单缓存 (ManifestCache) 文件
+        :param storePath: 全局对象库目录
+        :param upstream: 本机没有的文件重定向到的下载源, 默认官方源
+        """
+        self.minecraftPath = Path(minecraftPath)
+        self.metaCachePath = Path(metaCachePath) if metaCachePath else None
+        self.manifestCache = ManifestCache(manifestPath) if manifestPath else None
+        self.storePath = Path(storePath) if storePath else None
+        self.upstream = upstream or ORIGINS["Official"]
+        self.host = host
+        self.port = port
+        self.files = 0
+        self.bytes = 0
+        self.redirects = 0
+        self._server: _Server | None = None
+        self._lock = Lock()
+        self._objects: dict[str, Path] = {}     # 版本目录中文件的 SHA1 -> 路径 (客户端 JAR / 版本 JSON / 资源索引)
+        self._versions: dict[str, tuple[int, dict[str, Path]]] = {}    # 版本 -> (JSON 修改时间, 该版本的映射)
+        self._manifest: tuple[bytes, str] | None = None
+        self._manifestMtime = None
+
+    def start(self) -> "CacheServer":
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.cache = self
+        self.port = self._server.server_address[1]
+        Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is None: return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def count(self, size: int = 0, redirect: bool = False):
+        with self._lock:
+            if redirect: self.redirects += 1
+            else:
+                self.files += 1
+                self.bytes += size
+
+    def __str__(self) -> str:
+        return f"已提供 {self.files} 个文件 ({self.bytes / 1048576:.1f} MB), 重定向到上游 {self.redirects} 个"
+
+    @staticmethod
+    def _child(root: Path, rel: str) -> Path | None:
+        """root 下的相对路径, 不允许 .. 与绝对路径"""
+        parts = [p for p in rel.split("/") if p]
+        if not parts or any(p in (".", "..") or "\\" in p or ":" in p for p in parts): return None
+        return root.joinpath(*parts)
+
+    def _object(self, sha1: str) -> Path | None:
+        """按 SHA1 查找: 对象库, 版本 JSON / 资源索引缓存, 版本目录中的客户端 JAR 与 JSON"""
+        candidates = []
+        if self.storePath: candidates.append(self.storePath / sha1[:2] / sha1)
+        if self.metaCachePath: candidates.append(self.metaCachePath / sha1[:2] / f"{sha1}.json")
+        for path in candidates:
+            if path.is_file(): return path
+        return self._versionObjects().get(sha1)
+
+    def _versionObjects(self) -> dict[str, Path]:
+        """
+        扫描 versions 目录建立 SHA1 映射, 只重新解析 JSON 有变化的版本;
+        安装时先建版本目录再写 JSON, 所以按每个版本 JSON 的修改时间判断, 而不是 versions 目录
+        """
+        versionsDir = self.minecraftPath / "versions"
+        try:
+            entries = list(os.scandir(versionsDir))
+        except OSError:
+            return {}
+        with self._lock:
+            cached = dict(self._versions)
+        versions, changed = {}, False
+        for entry in entries:
+            path = Path(entry.path) / f"{entry.name}.json"
+            try:
+                mtime = path.stat().st_mtime_ns
+            except OSError:
+                continue
+            if (old := cached.get(entry.name)) and old[0] == mtime:
+                versions[entry.name] = old
+                continue
+            changed = True
+            try:
+                raw = path.read_bytes()
+                data = json.loads(raw)
+            except (OSError, ValueError):
+                continue
+            objects = {hashlib.sha1(raw).hexdigest(): path}
+            if client := data.get("downloads", {}).get("client", {}).get("sha1"):
+                objects[client] = Path(entry.path) / f"{entry.name}.jar"
+            if (assetIndex := data.get("assetIndex", {})).get("sha1"):
+                objects[assetIndex["sha1"]] = self.minecraftPath / "assets" / "indexes" / f"{assetIndex['id']}.json"
+            versions[entry.name] = (mtime, objects)
+        if not changed and versions.keys() == cached.keys(): return self._objects
+        objects = {sha1: path for _, mapping in versions.values() for sha1, path in mapping.items()}
+        with self._lock:
+            self._versions, self._objects = versions, objects
+        return objects
+
+    def resolve(self, path: str) -> Path | None:
+        """把请求路径映射到本机文件, 没有时返回 None"""
+        file = None
+        if path.startswith("/assets/"):
+            rel = path[len("/assets/"):]
+            if re.fullmatch(r"[0-9a-f]{2}/[0-9a-f]{40}", rel):
+                file = self.minecraftPath / "assets" / "objects" / rel
+                if not file.is_file() and self.storePath: file = self.storePath / rel    # 对象库与资源文件布局相同
+        elif path.startswith("/maven/"):
+            file = self._child(self.minecraftPath / "libraries", path[len("/maven/"):])
+        elif path.startswith(("/v1/packages/", "/v1/objects/")):
+            # piston-meta / piston-data 的地址: /v1/{packages,objects}/<SHA1>/<文件名>
+            parts = path.split("/")
+            if len(parts) == 5 and SHA1.fullmatch(parts[3]): file = self._object(parts[3])
+        return file if file is not None and file.is_file() else None
+
+    def upstreamUrl(self, path: str) -> str | None:
+        if ".." in path.split("/"): return None
+        if path.startswith("/assets/"): return str(self.upstream.Assets).rstrip("/") + path[len("/assets"):]
+        if path.startswith("/maven/"): return str(self.upstream.Library).rstrip("/") + path[len("/maven"):]
+        if path.startswith("/v1/objects/") and self.upstream is ORIGINS["Official"]: return OFFICIAL_DATA + path
+        if path.startswith(("/v1/", "/mc/")): return str(self.upstream.Versions).rstrip("/") + path
+        return None
+
+    def manifest(self) -> tuple[bytes, str] | None:
+        """由版本清单缓存还原的清单 JSON 与 ETag, 缓存文件变化时重新生成"""
+        if self.manifestCache is None: return None
+        try:
+            mtime = self.manifestCache.path.stat().st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            if mtime == self._manifestMtime: return self._manifest
+        cached = self.manifestCache.load()
+        if cached is None: return None
+        versions = sorted(cached.versions, key=lambda v: v.get("releaseTime", ""), reverse=True)
+        data = json.dumps({"latest": cached.latest, "versions": versions}, ensure_ascii=False).encode()
+        manifest = (data, f'"{hashlib.sha1(data).hexdigest()}"')
+        with self._lock:
+            self._manifest, self._manifestMtime = manifest, mtime
+        return manifest
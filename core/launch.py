@@ -0,0 +1,313 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import tempfile
+import uuid
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+
+from .library import ruleAllows, libraryArtifacts, mavenPath, osName, osArch
+from .natives import ExtractStats, extractNatives
+
+LAUNCH_FORMAT = 2
+PLACEHOLDER = re.compile(r"\$\{(\w+)}")
+
+# 旧版本 (minecraftArguments) 没有 JVM 参数, 使用官方启动器的默认值
+LEGACY_JVM_ARGS = ["-Djava.library.path=${natives_directory}", "-cp", "${classpath}"]
+
+
+def substitute(arg: str, values: dict[str, str]) -> str:
+    """替换 ${name} 占位符, 未提供的保持原样"""
+    return PLACEHOLDER.sub(lambda m: str(values.get(m[1], m[0])), arg)
+
+
+def evaluateArguments(entries: list, optional: list) -> list[str]:
+    """
+    按规则筛选参数: 只与系统相关的规则在此处求值;
+    依赖特性 (如 has_custom_resolution) 的参数追加到 optional, 启动时按需加入
+    """
+    args = []
+    for entry in entries:
+        if isinstance(entry, str):
+            args.append(entry)
+            continue
+        value = entry["value"]
+        value = [value] if isinstance(value, str) else list(value)
+        rules = entry.get("rules")
+        features = {k: v for rule in rules or [] for k, v in rule.get("features", {}).items()}
+        if features:
+            if ruleAllows(rules, features): optional.append((features, value))
+        elif ruleAllows(rules):
+            args.extend(value)
+    return args
+
+
+def statInput(path: str) -> list:
+    """[路径, 大小, 修改时间 (ns)], 文件不存在时大小为 -1"""
+    try:
+        st = os.stat(path)
+        return [path, st.st_size, st.st_mtime_ns]
+    except OSError:
+        return [path, -1, 0]
+
+
+@dataclass(slots=True)
+class LaunchPlan:
+    """
+    预先计算好的启动参数: 规则已求值, 类路径与目录已拼好, 只剩玩家相关的占位符
+    (auth_player_name, auth_uuid, auth_access_token 等) 在启动时替换;
+    inputs 记录生成时各输入文件的大小与修改时间, 启动前只需 stat 即可判断是否仍然有效
+    """
+    id: str
+    mainClass: str
+    classpath: list[str]
+    jvmArgs: list[str]
+    gameArgs: list[str]
+    optionalArgs: list[tuple[dict[str, bool], list[str]]] = field(default_factory=list)    # (所需特性, 参数)
+    nativesDir: str = ""
+    natives: list[tuple[str, list[str]]] = field(default_factory=list)    # (natives 压缩包, 排除前缀)
+    javaVersion: int | None = None
+    key: str = ""       # 版本 JSON (含继承链) 与依赖库集合的 SHA1
+    versions: list[str] = field(default_factory=list)     # 继承链上的版本 JSON, 子版本在前
+    inputs: list[list] = field(default_factory=list)      # 版本 JSON / 类路径 / natives 压缩包的 stat 结果
+
+    def command(self, java: str, values: dict[str, str], features: dict[str, bool] = None,
+                extraJvmArgs: list[str] = ()) -> list[str]:
+        """生成完整的启动命令"""
+        args = [*extraJvmArgs, *self.jvmArgs, self.mainClass, *self.gameArgs]
+        for need, extra in self.optionalArgs:
+            if all((features or {}).get(k, False) == v for k, v in need.items()): args.extend(extra)
+        return [java, *(substitute(arg, values) for arg in args)]
+
+    def stamp(self):
+        self.inputs = [statInput(path) for path in (*self.versions, *self.classpath, *(n for n, _ in self.natives))]
+
+    def changed(self) -> list[str]:
+        """与生成时相比大小或修改时间发生变化 (含被删除) 的输入文件"""
+        return [path for path, size, mtime in self.inputs if statInput(path) != [path, size, mtime]]
+
+    def missing(self) -> list[str]:
+        return [path for path, size, _ in self.inputs if size < 0]
+
+    def save(self, path: Path):
+        path = Path(path)
+        data = {"format": LAUNCH_FORMAT, **asdict(self)}
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException:
+            try: os.unlink(tmp)
+            except OSError: ...
+            raise
+
+    @classmethod
+    def load(cls, path: Path) -> "LaunchPlan | None":
+        """读取启动参数文件, 不存在或格式不符时返回 None"""
+        try:
+            data = json.loads(Path(path).read_bytes())
+            if data.pop("format", None) != LAUNCH_FORMAT: return None
+            data["optionalArgs"] = [(need, extra) for need, extra in data.get("optionalArgs", [])]
+            data["natives"] = [(archive, exclude) for archive, exclude in data.get("natives", [])]
+            return cls(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+
+def launchPlanPath(versionDir: Path, ver: str) -> Path:
+    return Path(versionDir) / f"{ver}.launch.json"
+
+
+def mergeVersion(parent: dict, child: dict) -> dict:
+    """按 inheritsFrom 合并: 子版本字段覆盖父版本, 依赖库子版本在前, 新格式参数依次拼接"""
+    merged = {**parent, **child}
+    merged["libraries"] = child.get("libraries", []) + parent.get("libraries", [])
+    if "arguments" in parent or "arguments" in child:
+        merged["arguments"] = {
+            k: parent.get("arguments", {}).get(k, []) + child.get("arguments", {}).get(k, []) for k in ("game", "jvm")
+        }
+    merged.pop("inheritsFrom", None)
+    return merged
+
+
+def loadVersion(versionsDir: Path, ver: str) -> tuple[dict, list[tuple[Path, bytes]]]:
+    """读取版本 JSON 并沿 inheritsFrom 合并, 返回合并结果与继承链上的 (路径, 内容), 子版本在前"""
+    chain: list[tuple[Path, bytes, dict]] = []
+    current = ver
+    while current:
+        if any(data.get("id") == current for _, _, data in chain): raise ValueError(f"版本 {current} 循环继承")
+        path = Path(versionsDir) / current / f"{current}.json"
+        raw = path.read_bytes()
+        data = json.loads(raw)
+        data.setdefault("id", current)
+        chain.append((path, raw, data))
+        current = data.get("inheritsFrom")
+
+    merged = {}
+    for _, _, data in reversed(chain):
+        merged = mergeVersion(merged, data)
+    # 客户端 JAR: 显式指定的 jar, 否则继承链上第一个存在的, 都不存在时为最底层版本
+    jar = next((data["jar"] for _, _, data in chain if data.get("jar")), None)
+    if jar is None:
+        jar = next((data["id"] for path, _, data in chain if (path.parent / f"{data['id']}.jar").exists()),
+                   chain[-1][2]["id"])
+    merged["jar"] = jar
+    return merged, [(path, raw) for path, raw, _ in chain]
+
+
+def classpathLibraries(libraries: list[dict]) -> list[str]:
+    """
+    类路径上的依赖库相对路径: 按规则筛选, 同一 group:artifact(:classifier) 只保留第一个 (子版本优先);
+    没有 downloads 的库 (如 Fabric / Forge 的 Maven 坐标) 按坐标推出路径
+    """
+    paths, seen = [], set()
+    for library in libraries:
+        if not ruleAllows(library.get("rules")): continue
+        name = library.get("name", "")
+        parts = name.partition("@")[0].split(":")
+        key = ":".join(parts[:2] + parts[3:]) if len(parts) >= 3 else name
+        artifact = library.get("downloads", {}).get("artifact")
+        if artifact and artifact.get("path"):
+            path = artifact["path"]
+        elif len(parts) >= 3 and "natives" not in library:
+            path = mavenPath(name)
+        else:
+            continue    # 只有 natives 的旧版库不在类路径上
+        if key in seen or path in paths: continue
+        seen.add(key)
+        paths.append(path)
+    return paths
+
+
+def buildLaunchPlan(ver: str, verData: dict, gameDir: Path, versionDir: Path, librariesDir: Path,
+                    assetsDir: Path, launcherName: str = "MinecraftLauncherDemo",
+                    launcherVersion: str = "1.0") -> LaunchPlan:
+    """由 (已合并的) 版本 JSON 生成启动参数, 与安装目录相关的占位符在此一次性替换"""
+    versionDir = Path(versionDir)
+    nativesDir = versionDir / "natives"
+    jar = verData.get("jar") or ver
+    libraries = verData.get("libraries", [])
+    classpath = [str(Path(librariesDir) / path) for path in classpathLibraries(libraries)]
+    classpath.append(str(versionDir.parent / jar / f"{jar}.jar"))
+    natives = [
+        (str(Path(librariesDir) / artifact.path), list(artifact.exclude))
+        for artifact in libraryArtifacts(libraries) if artifact.native
+    ]
+
+    assetIndex = verData.get("assetIndex", {}).get("id", verData.get("assets", ""))
+    values = {
+        "version_name": ver,
+        "version_type": verData.get("type", ""),
+        "game_directory": str(gameDir),
+        "assets_root": str(assetsDir),
+        "game_assets": str(assetsDir),
+        "assets_index_name": assetIndex,
+        "natives_directory": str(nativesDir),
+        "library_directory": str(librariesDir),
+        "classpath_separator": os.pathsep,
+        "classpath": os.pathsep.join(classpath),
+        "launcher_name": launcherName,
+        "launcher_version": launcherVersion,
+    }
+
+    optional = []
+    if "arguments" in verData:
+        jvmArgs = evaluateArguments(verData["arguments"].get("jvm") or LEGACY_JVM_ARGS, optional)
+        gameArgs = evaluateArguments(verData["arguments"].get("game", []), optional)
+    else:
+        jvmArgs = list(LEGACY_JVM_ARGS)
+        gameArgs = verData.get("minecraftArguments", "").split()
+
+    return LaunchPlan(
+        ver, verData["mainClass"], classpath,
+        [substitute(arg, values) for arg in jvmArgs],
+        [substitute(arg, values) for arg in gameArgs],
+        [(need, [substitute(arg, values) for arg in extra]) for need, extra in optional],
+        str(nativesDir), natives,
+        verData.get("javaVersion", {}).get("majorVersion")
+    )
+
+
+def planKey(chain: list[bytes], plan: LaunchPlan) -> str:
+    """版本 JSON 内容 + 系统 + 依赖库集合 (类路径与 natives) 决定启动参数"""
+    digest = hashlib.sha1()
+    for raw in chain:
+        digest.update(hashlib.sha1(raw).digest())
+    digest.update(f"{osName()}|{osArch()}|{plan.nativesDir}".encode())
+    digest.update("\n".join([*plan.classpath, *(n for n, _ in plan.natives)]).encode())
+    return digest.hexdigest()
+
+
+@dataclass(slots=True)
+class PreparedLaunch:
+    plan: LaunchPlan
+    state: str      # cached (stat 一致直接使用) / restamped (内容未变, 只更新记录) / built (重新生成)
+    extract: ExtractStats | None = None
+
+
+def preparePlan(gameDir: Path, ver: str, librariesDir: Path = None, assetsDir: Path = None,
+                force: bool = False, extract: bool = True) -> PreparedLaunch:
+    """
+    取得版本的启动参数: 缓存文件的输入 stat 一致时直接使用, 不解析 JSON 也不遍历目录;
+    有变化时重新读取版本 JSON, 键 (SHA1) 未变只更新 stat 记录, 否则重新生成并解压 natives
+    :param extract: 是否在 natives 压缩包变化时解压 (安装流程自行解压时关闭)
+    """
+    gameDir = Path(gameDir)
+    librariesDir = Path(librariesDir or gameDir / "libraries")
+    assetsDir = Path(assetsDir or gameDir / "assets")
+    versionDir = gameDir / "versions" / ver
+    path = launchPlanPath(versionDir, ver)
+
+    cached = None if force else LaunchPlan.load(path)
+    if cached is not None and not (changed := cached.changed()): return PreparedLaunch(cached, "cached")
+
+    verData, chain = loadVersion(gameDir / "versions", ver)
+    plan = buildLaunchPlan(ver, verData, gameDir, versionDir, librariesDir, assetsDir)
+    plan.versions = [str(p) for p, _ in chain]
+    plan.key = planKey([raw for _, raw in chain], plan)
+
+    stats = None
+    if cached is not None and cached.key == plan.key:
+        state = "restamped"
+        archives = {n for n, _ in plan.natives}
+        if extract and any(p in archives for p in changed):
+            stats = extractNatives([(Path(n), tuple(e)) for n, e in plan.natives], Path(plan.nativesDir))
+    else:
+        state = "built"
+        if extract: stats = extractNatives([(Path(n), tuple(e)) for n, e in plan.natives], Path(plan.nativesDir))
+    plan.stamp()
+    plan.save(path)
+    return PreparedLaunch(plan, state, stats)
+
+
+def offlineUuid(name: str) -> str:
+    """离线模式 UUID, 与 Java 的 UUID.nameUUIDFromBytes("OfflinePlayer:" + name) 一致"""
+    data = bytearray(hashlib.md5(f"OfflinePlayer:{name}".encode()).digest())
+    data[6] = data[6] & 0x0f | 0x30
+    data[8] = data[8] & 0x3f | 0x80
+    return uuid.UUID(bytes=bytes(data)).hex
+
+
+def offlineValues(name: str) -> dict[str, str]:
+    """离线账号的玩家相关占位符"""
+    return {
+        "auth_player_name": name, "auth_uuid": offlineUuid(name), "auth_access_token": "0", "auth_session": "0",
+        "auth_xuid": "0", "clientid": "0", "user_type": "legacy", "user_properties": "{}"
+    }
+
+
+def launchGame(plan: LaunchPlan, java: str, values: dict[str, str], gameDir: Path, features: dict[str, bool] = None,
+               extraJvmArgs: list[str] = (), log: Path = None) -> subprocess.Popen:
+    """启动游戏进程, 输出写入 log (为空时丢弃)"""
+    command = plan.command(java, values, features, extraJvmArgs)
+    output = subprocess.DEVNULL
+    if log is not None:
+        Path(log).parent.mkdir(parents=True, exist_ok=True)
+        output = open(log, "wb")
+    try:
+        return subprocess.Popen(command, cwd=gameDir, stdout=output, stderr=subprocess.STDOUT)
+    finally:
+        if log is not None: output.close()
@@ -0,0 +1,88 @@
+import platform
+import re
+import sys
+from dataclasses import dataclass
+
+OS_NAMES = {"Windows": "windows", "Darwin": "osx", "Linux": "linux"}
+# 版本 JSON / 资源索引 / 客户端 JAR 所在的官方主机, 镜像源以相同路径提供
+META_HOSTS = ("https://piston-meta.mojang.com", "https://piston-data.mojang.com",
+              "https://launchermeta.mojang.com", "https://launcher.mojang.com")
+
+
+@dataclass(slots=True)
+class Artifact:
+    path: str
+    url: str
+    sha1: str
+    size: int
+    native: bool = False
+    exclude: tuple[str, ...] = ()   # natives 解压时跳过的路径前缀
+
+
+def osName() -> str:
+    return OS_NAMES.get(platform.system(), platform.system().lower())
+
+
+def osArch() -> str:
+    """规则中的 arch 字段, 32 位系统为 x86"""
+    return "x86" if sys.maxsize <= 2 ** 32 else platform.machine().lower()
+
+
+def ruleAllows(rules: list[dict] | None, features: dict[str, bool] = None) -> bool:
+    """按官方规则语义判断: 无规则默认允许, 否则以最后一条匹配规则为准"""
+    if not rules: return True
+    allowed = False
+    for rule in rules:
+        _os = rule.get("os", {})
+        if "name" in _os and _os["name"] != osName(): continue
+        if "arch" in _os and _os["arch"] != osArch(): continue
+        if "version" in _os and not re.search(_os["version"], platform.release()): continue
+        if any((features or {}).get(k, False) != v for k, v in rule.get("features", {}).items()): continue
+        allowed = rule["action"] == "allow"
+    return allowed
+
+
+def nativeClassifier(library: dict) -> str | None:
+    natives = library.get("natives", {})
+    if osName() not in natives: return None
+    return natives[osName()].replace("${arch}", "32" if sys.maxsize <= 2 ** 32 else "64")
+
+
+def libraryArtifacts(libraries: list[dict]) -> list[Artifact]:
+    """筛选当前系统需要的依赖库文件 (含 natives), 按路径去重 (相同 SHA1 的不同路径都要下载, 启动时都在类路径中)"""
+    artifacts, seen = [], set()
+    for library in libraries:
+        if not ruleAllows(library.get("rules")): continue
+        downloads = library.get("downloads", {})
+        items = []
+        if "artifact" in downloads:
+            items.append((downloads["artifact"], False))
+        if (classifier := nativeClassifier(library)) and classifier in downloads.get("classifiers", {}):
+            items.append((downloads["classifiers"][classifier], True))
+        for item, native in items:
+            if not item.get("url") or item["path"] in seen: continue
+            seen.add(item["path"])
+            exclude = tuple(library.get("extract", {}).get("exclude", ())) if native else ()
+            artifacts.append(Artifact(item["path"], item["url"], item.get("sha1"), item.get("size"), native, exclude))
+    return artifacts
+
+
+def mavenPath(name: str) -> str:
+    """Maven 坐标 group:artifact:version[:classifier][@ext] 对应的相对路径"""
+    name, _, ext = name.partition("@")
+    group, artifact, version, *classifier = name.split(":")
+    suffix = f"-{classifier[0]}" if classifier else ""
+    return f"{group.replace('.', '/')}/{artifact}/{version}/{artifact}-{version}{suffix}.{ext or 'jar'}"
+
+
+def mirrorUrl(url: str, official: str, mirror: str) -> str:
+    """把官方源地址替换为镜像源地址"""
+    official, mirror = official.rstrip("/"), mirror.rstrip("/")
+    return mirror + url[len(official):] if url.startswith(official + "/") else url
+
+
+def mirrorMetaUrl(url: str, mirror: str) -> str:
+    """把官方版本文件主机上的地址替换为镜像源地址"""
+    for host in META_HOSTS:
+        if url.startswith(host + "/"): return mirrorUrl(url, host, mirror)
+    return url
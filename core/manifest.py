@@ -0,0 +1,107 @@
+import marshal
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import requests
+
+MANIFEST_PATH = "/mc/game/version_manifest_v2.json"
+CACHE_FORMAT = 2
+FIELDS = ("id", "type", "url", "time", "releaseTime", "sha1", "complianceLevel")
+CATEGORIES = ("release", "snapshot", "old")
+
+
+def versionCategory(_type: str) -> str:
+    if _type == "release": return "release"
+    if _type in ("old_beta", "old_alpha"): return "old"
+    return "snapshot"
+
+
+@dataclass(slots=True)
+class Manifest:
+    latest: dict = field(default_factory=dict)
+    buckets: dict[str, list[dict]] = field(default_factory=lambda: {c: [] for c in CATEGORIES})
+    etag: str | None = None
+    lastModified: str | None = None
+    source: str | None = None     # 清单所在的下载源地址, 切换下载源后不再用旧的验证器
+
+    @classmethod
+    def fromJson(cls, data: dict, etag: str = None, lastModified: str = None, source: str = None) -> "Manifest":
+        manifest = cls(data.get("latest", {}), etag=etag, lastModified=lastModified, source=source)
+        for v in data["versions"]:
+            manifest.buckets[versionCategory(v["type"])].append(v)
+        return manifest
+
+    def find(self, ver: str) -> dict | None:
+        """按版本号查找, release / snapshot 表示对应的最新版本"""
+        ver = self.latest.get(ver, ver)
+        for bucket in self.buckets.values():
+            for v in bucket:
+                if v["id"] == ver: return v
+        return None
+
+    @property
+    def versions(self) -> list[dict]:
+        return [v for bucket in self.buckets.values() for v in bucket]
+
+
+def fetchManifest(origin, session: requests.Session, timeout: float = 10) -> dict:
+    """从下载源获取版本清单 (v2, 每个版本带有版本 JSON 的 SHA1)"""
+    resp = session.get(str(origin.Versions).rstrip("/") + MANIFEST_PATH, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json()
+
+
+class ManifestCache:
+    """
+    版本清单缓存: 只保留用到的字段, 预先分好类后以 marshal 保存, 启动时无需解析完整 JSON 再分类;
+    后台用 ETag / If-Modified-Since 条件请求重新验证, 未变化时服务器只返回 304
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> Manifest | None:
+        """读取缓存, 不存在或格式不符时返回 None"""
+        try:
+            data = marshal.loads(self.path.read_bytes())     # 整体读入再解析, 逐块读取文件对象要慢得多
+            if data.get("format") != CACHE_FORMAT: return None
+        except (OSError, EOFError, ValueError, TypeError, AttributeError):
+            return None     # 缓存不存在或由其他 Python 版本写入, 重新下载即可
+        return Manifest(data["latest"], data["buckets"], data["etag"], data["lastModified"], data["source"])
+
+    def save(self, manifest: Manifest):
+        data = {
+            "format": CACHE_FORMAT, "latest": manifest.latest, "etag": manifest.etag, "lastModified": manifest.lastModified,
+            "source": manifest.source,
+            "buckets": {
+                category: [{k: v[k] for k in FIELDS if k in v} for v in versions]
+                for category, versions in manifest.buckets.items()
+            }
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f".{self.path.name}.", dir=self.path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(marshal.dumps(data))
+            os.replace(tmp, self.path)
+        except BaseException:
+            try: os.unlink(tmp)
+            except OSError: ...
+            raise
+
+    def refresh(self, origin, session: requests.Session, timeout: float = 10,
+                cached: Manifest = None) -> Manifest | None:
+        """条件请求重新验证, 清单有更新时保存并返回新清单, 未变化时返回 None"""
+        source = str(origin.Versions).rstrip("/")
+        headers = {}
+        if cached is not None and cached.source == source:
+            if cached.etag: headers["If-None-Match"] = cached.etag
+            if cached.lastModified: headers["If-Modified-Since"] = cached.lastModified
+        resp = session.get(source + MANIFEST_PATH, headers=headers, timeout=timeout)
+        if resp.status_code == 304: return None
+        resp.raise_for_status()
+        manifest = Manifest.fromJson(resp.json(), resp.headers.get("ETag"), resp.headers.get("Last-Modified"), source)
+        self.save(manifest)
+        return manifest
@@ -0,0 +1,113 @@
+import mmap
+import os
+import shutil
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from threading import get_ident
+
+MMAP_MIN_SIZE = 1 << 20     # 不小于 1 MB 的压缩包以内存映射方式读取
+
+
+class _Mapped(mmap.mmap):
+    """zipfile 需要 seekable(), mmap 本身没有"""
+
+    def seekable(self) -> bool:
+        return True
+
+
+@dataclass(slots=True)
+class ExtractStats:
+    archives: int = 0
+    extracted: int = 0
+    skipped: int = 0        # 大小与 CRC 一致, 无需重新解压
+    bytes: int = 0
+    failed: int = 0         # 损坏或无法读取的压缩包
+
+    def merge(self, other: "ExtractStats"):
+        self.archives += other.archives
+        self.extracted += other.extracted
+        self.skipped += other.skipped
+        self.bytes += other.bytes
+        self.failed += other.failed
+
+    def __str__(self) -> str:
+        text = f"{self.archives} 个压缩包, 解压 {self.extracted} 个文件 ({self.bytes / 1048576:.1f} MB), 跳过 {self.skipped} 个"
+        return text + (f", {self.failed} 个压缩包损坏" if self.failed else "")
+
+
+def fileCrc32(path: Path) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        while data := f.read(262144):
+            crc = zlib.crc32(data, crc)
+    return crc
+
+
+def _unchanged(dest: Path, info: zipfile.ZipInfo) -> bool:
+    try:
+        if dest.stat().st_size != info.file_size: return False
+    except OSError:
+        return False
+    return fileCrc32(dest) == info.CRC
+
+
+def extractArchive(archive: Path, target: Path, exclude: tuple[str, ...] = ()) -> ExtractStats:
+    """
+    把一个 natives 压缩包解压到 target, 跳过 exclude 前缀 (如 META-INF/) 与已存在且大小 / CRC 一致的文件;
+    大文件用内存映射读取, 解压结果先写临时文件再原子替换
+    """
+    stats = ExtractStats(archives=1)
+    with open(archive, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        source = _Mapped(f.fileno(), 0, access=mmap.ACCESS_READ) if size >= MMAP_MIN_SIZE else f
+        try:
+            with zipfile.ZipFile(source) as z:
+                for info in z.infolist():
+                    name = info.filename
+                    if info.is_dir() or name.startswith(tuple(exclude)): continue
+                    parts = Path(name).parts
+                    if os.path.isabs(name) or ".." in parts: continue    # 不允许写到目录之外
+                    dest = target.joinpath(*parts)
+                    if _unchanged(dest, info):
+                        stats.skipped += 1
+                        continue
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = dest.with_name(f".{dest.name}.{get_ident()}.tmp")
+                    try:
+                        with z.open(info) as src, open(tmp, "wb") as out:
+                            shutil.copyfileobj(src, out, 1 << 20)
+                        os.replace(tmp, dest)
+                    except BaseException:
+                        try: os.unlink(tmp)
+                        except OSError: ...
+                        raise
+                    stats.extracted += 1
+                    stats.bytes += info.file_size
+        finally:
+            if source is not f: source.close()
+    return stats
+
+
+def extractNatives(archives: list[tuple[Path, tuple[str, ...]]], target: Path, workers: int = None) -> ExtractStats:
+    """
+    并行解压多个 (压缩包, 排除前缀) 到同一 natives 目录, 解压主要耗时在 zlib 中, 不受 GIL 限制;
+    损坏的压缩包计入 failed, 不影响其他压缩包
+    """
+    target = Path(target)
+    target.mkdir(parents=True, exist_ok=True)
+    stats = ExtractStats()
+    if not archives: return stats
+
+    def run(item: tuple[Path, tuple[str, ...]]) -> ExtractStats:
+        try:
+            return extractArchive(Path(item[0]), target, item[1])
+        except (OSError, zipfile.BadZipFile, ValueError):
+            return ExtractStats(archives=1, failed=1)
+
+    with ThreadPoolExecutor(min(len(archives), workers or os.cpu_count() or 4)) as pool:
+        for result in pool.map(run, archives):
+            stats.merge(result)
+    return stats
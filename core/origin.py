@@ -0,0 +1,184 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Event, Lock, Thread, Timer
+from typing import Callable
+
+import requests
+
+from .download import Cancelled
+from .manifest import MANIFEST_PATH
+
+ORIGIN_FIELDS = ("Versions", "Assets", "Library")
+
+
+@dataclass(slots=True)
+class OriginStats:
+    latency: float = 0.5          # 小文件请求耗时 EWMA (秒)
+    throughput: float = 1 << 20   # 吞吐 EWMA (字节/秒)
+    failures: int = 0             # 连续失败次数
+    downUntil: float = 0          # 熔断截止时间
+    samples: deque = field(default_factory=lambda: deque(maxlen=200))
+
+    def score(self) -> float:
+        """预计下载一个 64 KB 小文件的耗时"""
+        return self.latency + 65536 / max(self.throughput, 1)
+
+
+class OriginRouter:
+    """多下载源测速择优: 按得分选择最快的健康源, 慢请求对冲到次优源, 连续失败的源暂时摘除"""
+
+    def __init__(self, origins: dict, hedgePercentile: float = 0.95, hedgeAfter: float = 2.0,
+                 hedgeMaxSize: int = 1 << 20, failureLimit: int = 3, cooldown: float = 30, alpha: float = 0.2):
+        """
+        :param origins: 源名称 -> UrlOrigin (具有 Versions / Assets / Library 属性)
+        :param hedgeAfter: 样本不足时的对冲等待时间
+        :param hedgeMaxSize: 只对不超过该大小的文件发起对冲请求
+        """
+        self.origins = origins
+        self.hedgePercentile = hedgePercentile
+        self.hedgeAfter = hedgeAfter
+        self.hedgeMaxSize = hedgeMaxSize
+        self.failureLimit = failureLimit
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self.stats = {name: OriginStats() for name in origins}
+        self._lock = Lock()
+
+    def healthy(self, name: str) -> bool:
+        return self.stats[name].downUntil <= time.monotonic()
+
+    def ranked(self) -> list[str]:
+        """健康源按得分升序, 熔断中的源排在最后作为兜底"""
+        with self._lock:
+            return sorted(self.stats, key=lambda n: (not self.healthy(n), self.stats[n].score()))
+
+    def candidates(self, url: str) -> list[tuple[str, str]]:
+        """把 URL 映射到每个源的等价地址, 无法映射时只返回原地址"""
+        bases = sorted(
+            ((str(getattr(origin, f)).rstrip("/"), f) for origin in self.origins.values() for f in ORIGIN_FIELDS),
+            key=lambda b: -len(b[0])
+        )
+        for base, kind in bases:
+            if url.startswith(base + "/"):
+                rel = url[len(base):]
+                return [(name, str(getattr(self.origins[name], kind)).rstrip("/") + rel) for name in self.ranked()]
+        return [(None, url)]
+
+    def record(self, name: str, ok: bool, duration: float = 0, size: int = 0):
+        if name is None: return
+        with self._lock:
+            stats = self.stats[name]
+            if not ok:
+                stats.failures += 1
+                if stats.failures >= self.failureLimit:
+                    stats.downUntil = time.monotonic() + self.cooldown
+                return
+            stats.failures = 0
+            stats.downUntil = 0
+            if size < self.hedgeMaxSize:
+                stats.samples.append(duration)
+                stats.latency += self.alpha * (duration - stats.latency)
+            elif duration > 0:
+                stats.throughput += self.alpha * (size / duration - stats.throughput)
+
+    def hedgeDelay(self, name: str) -> float:
+        """对冲等待时间: 该源近期小文件耗时的百分位数"""
+        with self._lock:
+            samples = sorted(self.stats[name].samples) if name is not None else []
+        if len(samples) < 20: return self.hedgeAfter
+        return samples[min(len(samples) - 1, int(len(samples) * self.hedgePercentile))]
+
+    def _run(self, name: str, url: str, attempt: Callable, cancel: Event, size: int):
+        start = time.monotonic()
+        try:
+            attempt(name, url, cancel)
+        except Cancelled:
+            raise
+        except Exception:
+            self.record(name, False)
+            raise
+        self.record(name, True, time.monotonic() - start, size or 0)
+
+    def fetch(self, url: str, attempt: Callable[[str, str, Event], None], size: int = None) -> str:
+        """
+        在最优源上执行 attempt(源名称, 地址, 取消事件), 超过对冲时间未完成时在次优源上并发执行,
+        任一成功即返回成功的源名称; attempt 应在取消事件置位后抛出 Cancelled
+        """
+        candidates = self.candidates(url)
+        name, target = candidates[0]
+        if len(candidates) < 2 or (size is not None and size > self.hedgeMaxSize):
+            self._run(name, target, attempt, Event(), size)
+            return name
+
+        hedgeName, hedgeTarget = candidates[1]
+        primaryCancel, hedgeCancel, hedgeDone = Event(), Event(), Event()
+        hedgeError = []
+        state = {"closed": False, "started": False}
+        lock = Lock()
+
+        def runHedge():
+            try:
+                self._run(hedgeName, hedgeTarget, attempt, hedgeCancel, size)
+                primaryCancel.set()
+            except Exception as e:
+                hedgeError.append(e)
+            finally:
+                hedgeDone.set()
+
+        def startHedge():
+            with lock:
+                if state["closed"]: return
+                state["started"] = True
+            Thread(target=runHedge, daemon=True).start()
+
+        timer = Timer(self.hedgeDelay(name), startHedge)
+        timer.daemon = True
+        timer.start()
+        error = None
+        try:
+            self._run(name, target, attempt, primaryCancel, size)
+        except Exception as e:
+            error = e
+        timer.cancel()
+        with lock:
+            state["closed"] = True
+            started = state["started"]
+        if error is None:
+            hedgeCancel.set()
+            return name
+        if started:
+            hedgeDone.wait()
+            if not hedgeError: return hedgeName
+        raise error
+
+    def probe(self, sessionFor: Callable[[str], requests.Session], timeout: float = 5, limit: int = 262144):
+        """并发测量各源的首字节延迟与吞吐"""
+
+        def measure(name: str):
+            url = str(self.origins[name].Versions).rstrip("/") + MANIFEST_PATH
+            start = time.monotonic()
+            try:
+                with sessionFor(name).get(url, stream=True, timeout=timeout) as resp:
+                    resp.raise_for_status()
+                    latency = time.monotonic() - start
+                    received = 0
+                    for chunk in resp.iter_content(chunk_size=65536):
+                        received += len(chunk)
+                        if received >= limit: break
+                elapsed = max(time.monotonic() - start - latency, 1e-3)
+            except Exception:
+                with self._lock:
+                    self.stats[name].failures = self.failureLimit
+                    self.stats[name].downUntil = time.monotonic() + self.cooldown
+                return
+            with self._lock:
+                stats = self.stats[name]
+                stats.latency = latency
+                stats.throughput = received / elapsed
+                stats.failures = 0
+                stats.downUntil = 0
+
+        with ThreadPoolExecutor(max_workers=len(self.origins)) as executor:
+            list(executor.map(measure, self.origins))
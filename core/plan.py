@@ -0,0 +1,65 @@
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .index import FileIndex
+
+
+def scanTree(root: Path) -> dict[str, tuple[int, int]]:
+    """os.scandir 单次遍历 root, 返回 绝对路径 -> (大小, mtime); 目录不存在时为空"""
+    result = {}
+    stack = [os.path.abspath(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        result[entry.path] = (st.st_size, st.st_mtime_ns)
+                except OSError: ...
+    return result
+
+
+@dataclass(slots=True)
+class DownloadPlan:
+    present: int = 0                    # 索引中有记录且 stat 未变化, 无需任何操作
+    presentBytes: int = 0
+    missing: int = 0                    # 不存在或大小不符
+    verify: int = 0                     # 大小一致但索引中没有记录 (或没有 SHA1), 交给下载任务校验
+    tasks: list[tuple[str, Path, str, int]] = field(default_factory=list)
+    fetchBytes: int = 0
+
+    def __str__(self) -> str:
+        return (f"{self.present} 个已存在, {self.missing} 个待下载, {self.verify} 个待校验 "
+                f"({self.fetchBytes / 1048576:.1f} MB)")
+
+
+def planDownloads(tasks: list[tuple[str, Path, str, int]], root: Path, index: FileIndex = None) -> DownloadPlan:
+    """
+    下载前的计划阶段: 扫描一次 root 并与已校验文件索引比对,
+    只保留缺失 / 大小不符 / 需要校验的 (url, 路径, SHA1, 大小) 任务
+    """
+    stats = scanTree(root)
+    known = index.entries(root) if index else {}
+    plan = DownloadPlan()
+    for task in tasks:
+        url, path, sha1, size = task
+        key = os.path.abspath(path)
+        st = stats.get(key)
+        if st is None or (size is not None and st[0] != size):
+            plan.missing += 1
+            plan.fetchBytes += size or 0
+        elif sha1 and known.get(key) == (st[0], st[1], sha1):
+            plan.present += 1
+            plan.presentBytes += st[0]
+            continue
+        else:
+            plan.verify += 1
+        plan.tasks.append(task)
+    return plan
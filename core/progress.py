@@ -0,0 +1,119 @@
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class ProgressSnapshot:
+    totalFiles: int = 0
+    totalBytes: int = 0
+    bytes: int = 0          # 实际传输的字节数
+    skippedBytes: int = 0   # 已存在而跳过的文件大小
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0
+    stage: str = ""
+
+    @property
+    def files(self) -> int:
+        return self.completed + self.failed + self.skipped
+
+    @property
+    def speed(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0
+
+    def __add__(self, other: "ProgressSnapshot") -> "ProgressSnapshot":
+        return ProgressSnapshot(
+            self.totalFiles + other.totalFiles, self.totalBytes + other.totalBytes,
+            self.bytes + other.bytes, self.skippedBytes + other.skippedBytes,
+            self.completed + other.completed, self.failed + other.failed, self.skipped + other.skipped,
+            max(self.elapsed, other.elapsed), other.stage or self.stage
+        )
+
+
+class Progress:
+    """
+    下载进度计数器: 每个工作线程只写自己的计数槽, 自增无需加锁,
+    界面按固定频率调用 snapshot 汇总, 不再每个文件发一次信号
+    """
+    BYTES, SKIPPED_BYTES, COMPLETED, FAILED, SKIPPED = range(5)
+
+    def __init__(self, trace=None):
+        """:param trace: 记录每次传输的 Trace, 为空时不记录"""
+        self.trace = trace
+        self.totalFiles = 0
+        self.totalBytes = 0
+        self.stage = ""
+        self.finished = False
+        self.start = time.monotonic()
+        self.end = None
+        self._slots: list[list[int]] = []
+        self._timings: list[list[float]] = []     # 每个文件的处理耗时, 与计数槽一样按线程分开
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _slot(self) -> list[int]:
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            slot = self._local.slot = [0] * 5
+            timings = self._local.timings = []
+            with self._lock:     # 每个线程只注册一次
+                self._slots.append(slot)
+                self._timings.append(timings)
+        return slot
+
+    def _time(self, seconds: float | None):
+        if seconds is not None: self._local.timings.append(seconds)
+
+    def addTotal(self, files: int, size: int = 0):
+        with self._lock:
+            self.totalFiles += files
+            self.totalBytes += size
+
+    def addBytes(self, n: int):
+        self._slot()[self.BYTES] += n
+
+    def complete(self, seconds: float = None):
+        self._slot()[self.COMPLETED] += 1
+        self._time(seconds)
+
+    def fail(self, seconds: float = None):
+        self._slot()[self.FAILED] += 1
+        self._time(seconds)
+
+    def skip(self, size: int = 0, seconds: float = None):
+        slot = self._slot()
+        slot[self.SKIPPED] += 1
+        slot[self.SKIPPED_BYTES] += size or 0
+        self._time(seconds)
+
+    def record(self, transfer):
+        if self.trace: self.trace.add(transfer)
+
+    def skipMany(self, files: int, size: int = 0):
+        """计划阶段确认已存在的文件批量计入跳过"""
+        slot = self._slot()
+        slot[self.SKIPPED] += files
+        slot[self.SKIPPED_BYTES] += size
+
+    def latencies(self) -> list[float]:
+        """所有已记录的单文件耗时 (升序)"""
+        with self._lock:
+            timings = list(self._timings)
+        return sorted(t for part in timings for t in list(part))
+
+    def finish(self):
+        self.end = time.monotonic()
+        self.finished = True
+
+    def snapshot(self) -> ProgressSnapshot:
+        with self._lock:
+            slots = list(self._slots)
+            totalFiles, totalBytes = self.totalFiles, self.totalBytes
+        sums = [sum(slot[i] for slot in slots) for i in range(5)]
+        return ProgressSnapshot(
+            totalFiles, totalBytes, sums[self.BYTES], sums[self.SKIPPED_BYTES],
+            sums[self.COMPLETED], sums[self.FAILED], sums[self.SKIPPED],
+            (self.end or time.monotonic()) - self.start, self.stage
+        )
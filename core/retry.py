@@ -0,0 +1,63 @@
+import random
+import time
+from threading import Lock
+from urllib.parse import urlsplit
+
+
+class RetryLater(Exception):
+    """本次尝试失败, 任务应在 delay 秒后重新排队, 期间不占用并发"""
+
+    def __init__(self, delay: float):
+        super().__init__(delay)
+        self.delay = delay
+
+
+def backoff(attempt: int, base: float = 0.1, cap: float = 5) -> float:
+    """指数退避加全随机抖动: 第 attempt 次重试在 [0, min(cap, base * 2^attempt)] 内随机等待, 避免同时重试"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RetryBudget:
+    """
+    按主机的重试预算 (令牌桶): 每次重试消耗 1 个令牌, 每次成功补充 ratio 个, 另按时间缓慢恢复;
+    出错过多的主机很快耗尽预算, 之后的失败直接判定为失败, 不再反复占用并发
+    """
+
+    def __init__(self, ratio: float = 0.5, minimum: float = 20, maximum: float = 200, refill: float = 2):
+        """
+        :param minimum: 每台主机的初始令牌数
+        :param refill: 每秒自动恢复的令牌数
+        """
+        self.ratio = ratio
+        self.minimum = minimum
+        self.maximum = maximum
+        self.refill = refill
+        self._hosts: dict[str, list[float]] = {}    # 主机 -> [令牌数, 上次更新时间]
+        self._lock = Lock()
+
+    def _bucket(self, url: str) -> list[float]:
+        host = urlsplit(url).netloc
+        bucket = self._hosts.get(host)
+        now = time.monotonic()
+        if bucket is None:
+            bucket = self._hosts[host] = [self.minimum, now]
+        else:
+            bucket[0] = min(self.maximum, bucket[0] + (now - bucket[1]) * self.refill)
+            bucket[1] = now
+        return bucket
+
+    def success(self, url: str):
+        with self._lock:
+            bucket = self._bucket(url)
+            bucket[0] = min(self.maximum, bucket[0] + self.ratio)
+
+    def allow(self, url: str) -> bool:
+        """预算充足时扣除一次重试并返回 True"""
+        with self._lock:
+            bucket = self._bucket(url)
+            if bucket[0] < 1: return False
+            bucket[0] -= 1
+            return True
+
+
+retryBudget = RetryBudget()
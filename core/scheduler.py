@@ -0,0 +1,210 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import count
+from threading import Lock, Thread
+from typing import Callable, Hashable
+
+from .progress import Progress
+from .retry import RetryLater
+from .throttle import AdaptiveConcurrency
+
+
+class SharedProgress:
+    """合并下载的进度转发: 同一次传输的进度同时计入所有等待它的安装"""
+
+    def __init__(self):
+        self._progresses: list[Progress] = []
+        self.bytes = 0
+        self.outcome: tuple | None = None   # 结束后记录 (方法名, 参数), 之后加入的安装补上这一次计数
+        self._lock = Lock()
+
+    def attach(self, progress: Progress):
+        with self._lock:
+            if progress is None or progress in self._progresses: return
+            self._progresses.append(progress)
+            if self.bytes: progress.addBytes(self.bytes)     # 补上加入前已传输的字节
+            if self.outcome: getattr(progress, self.outcome[0])(*self.outcome[1])
+
+    def addBytes(self, n: int):
+        with self._lock:
+            self.bytes += n
+            for progress in self._progresses: progress.addBytes(n)
+
+    def record(self, transfer):
+        with self._lock:
+            progresses = list(self._progresses)
+        for progress in progresses: progress.record(transfer)
+
+    def _finish(self, method: str, *args):
+        with self._lock:
+            self.outcome = (method, args)
+            progresses = list(self._progresses)
+        for progress in progresses: getattr(progress, method)(*args)
+
+    def complete(self, seconds: float = None):
+        self._finish("complete", seconds)
+
+    def fail(self, seconds: float = None):
+        self._finish("fail", seconds)
+
+    def skip(self, size: int = 0, seconds: float = None):
+        self._finish("skip", size, seconds)
+
+
+class Job:
+    __slots__ = ("key", "fn", "priority", "coroutine", "future", "progress", "started", "deferred")
+
+    def __init__(self, key: Hashable, fn: Callable, priority: int, coroutine: bool = False):
+        self.key = key
+        self.fn = fn
+        self.priority = priority
+        self.coroutine = coroutine  # fn 返回协程, 在调度线程的事件循环中执行, 不占用线程
+        self.future = Future()
+        self.progress = SharedProgress()
+        self.started = False
+        self.deferred = False   # 在退避等待中, 到期后以重试身份排在同级新任务之后
+
+
+class Scheduler:
+    """
+    进程内全局下载调度器: 所有安装共用一个并发预算, 按优先级出队 (同级先进先出),
+    目标相同的任务在完成前只执行一次, 后来者共享同一个 Future;
+    调度在一个后台事件循环中进行: 普通任务在线程池中执行, 协程任务 (异步引擎) 直接在循环中执行,
+    两者占用同一个并发预算; 任务抛出 RetryLater 时释放预算, 退避到期后排在同级新任务之后重新执行
+    """
+    META, CLIENT, LIBRARY, ASSET, PREFETCH = range(5)
+
+    def __init__(self, budget: int = 16):
+        self.budget = max(1, budget)
+        self.threads = self.budget      # 普通任务的线程数上限, 协程任务不受限制
+        self._inflight: dict[Hashable, Job] = {}
+        self._seq = count()
+        self._lock = Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.PriorityQueue | None = None
+        self._slots: asyncio.Condition | None = None    # 预算或运行数变化时通知调度协程
+        self._active = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._executor = ThreadPoolExecutor(self.threads, "download")
+        self.adaptive: AdaptiveConcurrency | None = None
+
+    def configure(self, budget: int, adaptive: bool = False, threads: int = None):
+        """
+        固定并发时 budget 即并发数; 自适应时 budget 为上限,
+        实际并发数由 AIMD 控制器根据吞吐 / 出错率 / 延迟动态调整;
+        threads 为普通任务的线程数上限, 默认与 budget 相同
+        """
+        threads = max(1, threads or budget)
+        if threads != self.threads:
+            old, self._executor, self.threads = self._executor, ThreadPoolExecutor(threads, "download"), threads
+            old.shutdown(wait=False)    # 正在执行的任务在旧线程池中完成
+        # 每次创建安装引擎都会调用, 设置未变时保持当前状态 (自适应控制器的学习结果等)
+        if adaptive == (self.adaptive is not None) and budget == (self.adaptive.maximum if adaptive else self.budget):
+            return
+        if adaptive:
+            if self.adaptive is None:
+                # 异步引擎的预算较大, 从上限的 1/8 开始增长
+                self.adaptive = AdaptiveConcurrency(min(max(8, budget // 8), budget), maximum=budget,
+                                                    onChange=self.setBudget)
+            else:
+                self.adaptive.setMaximum(budget)
+            budget = self.adaptive.limit
+        else:
+            self.adaptive = None
+        self.setBudget(budget)
+
+    def setBudget(self, budget: int):
+        """调整全局并发数, 正在执行的任务不受影响, 超出新预算时暂停出队"""
+        with self._lock:
+            self.budget = max(1, budget)
+            loop = self._loop
+        if loop: asyncio.run_coroutine_threadsafe(self._notify(), loop)
+
+    async def _notify(self):
+        async with self._slots:
+            self._slots.notify_all()
+
+    def _ensureLoop(self) -> asyncio.AbstractEventLoop:
+        """首次提交时启动调度线程, 调用方需持有 _lock"""
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            self._queue = asyncio.PriorityQueue()
+            self._slots = asyncio.Condition()
+            Thread(target=loop.run_forever, name="scheduler", daemon=True).start()
+            asyncio.run_coroutine_threadsafe(self._dispatch(), loop)
+            self._loop = loop
+        return self._loop
+
+    def submit(self, key: Hashable, fn: Callable[[SharedProgress], object], priority: int = ASSET,
+               progress: Progress = None, coroutine: bool = False) -> Future:
+        """
+        提交任务 fn(进度), 相同 key 的任务正在排队或执行时直接返回其 Future;
+        优先级更高的提交会把排队中的任务提前; coroutine=True 时 fn 返回协程
+        """
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is None:
+                job = self._inflight[key] = Job(key, fn, priority, coroutine)
+            elif priority < job.priority and not job.started and not job.deferred:
+                job.priority = priority
+            else:
+                if priority < job.priority: job.priority = priority     # 退避中的任务到期后按新的优先级排队
+                job.progress.attach(progress)
+                return job.future
+            job.progress.attach(progress)
+            self._ensureLoop().call_soon_threadsafe(self._queue.put_nowait, (priority, False, next(self._seq), job))
+        return job.future
+
+    def run(self, coro) -> Future:
+        """在调度线程的事件循环中执行协程 (如关闭异步客户端), 返回 concurrent.futures.Future"""
+        with self._lock:
+            loop = self._ensureLoop()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    async def _dispatch(self):
+        while True:
+            async with self._slots:
+                await self._slots.wait_for(lambda: self._active < self.budget)
+            job: Job = (await self._queue.get())[-1]
+            with self._lock:
+                if job.started or job.deferred: continue     # 提升优先级后留在队列中的旧条目
+                job.started = True
+            self._active += 1
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: Job):
+        try:
+            if job.coroutine:
+                result = await job.fn(job.progress)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(self._executor, job.fn, job.progress)
+        except RetryLater as e:
+            # 退避期间不占用预算, 到期后重新排队
+            with self._lock:
+                job.started = False
+                job.deferred = True
+            asyncio.get_running_loop().call_later(e.delay, self._requeue, job)
+        except BaseException as e:
+            with self._lock: self._inflight.pop(job.key, None)
+            job.future.set_exception(e)
+        else:
+            with self._lock: self._inflight.pop(job.key, None)
+            job.future.set_result(result)
+        finally:
+            async with self._slots:
+                self._active -= 1
+                self._slots.notify_all()
+
+    def _requeue(self, job: Job):
+        with self._lock:
+            job.deferred = False
+            self._queue.put_nowait((job.priority, True, next(self._seq), job))
+
+
+scheduler = Scheduler()
@@ -0,0 +1,79 @@
+import time
+from threading import Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .telemetry import currentTransfer
+
+
+class TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.monotonic()
+        super().connect()
+        if (transfer := currentTransfer.get()) is not None: transfer.connect = time.monotonic() - start
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.monotonic()
+        super().connect()
+        if (transfer := currentTransfer.get()) is not None: transfer.connect = time.monotonic() - start
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """记录新建连接 (含 DNS 与 TLS) 的耗时到当前传输"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+def recordTtfb(resp: requests.Response, *args, **kwargs):
+    """响应钩子: 发出请求到解析完响应头的耗时"""
+    if (transfer := currentTransfer.get()) is not None:
+        transfer.ttfb = resp.elapsed.total_seconds()
+        transfer.protocol = "HTTP/1.0" if getattr(resp.raw, "version", 11) == 10 else "HTTP/1.1"
+
+
+class SessionPool:
+    """按下载源复用的 HTTP 长连接池 (线程安全)"""
+
+    def __init__(self):
+        self._sessions: dict[str, tuple[int, requests.Session]] = {}
+        self._lock = Lock()
+
+    def get(self, origin: str, poolSize: int = 16) -> requests.Session:
+        """获取下载源对应的 Session, 连接池大小变化时重建"""
+        with self._lock:
+            cached = self._sessions.get(origin)
+            if cached is not None and cached[0] == poolSize:
+                return cached[1]
+            session = requests.Session()
+            # 每个源只涉及少量主机, 每台主机最多保持 poolSize 条空闲长连接
+            adapter = TimedHTTPAdapter(pool_connections=4, pool_maxsize=max(1, poolSize))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.hooks["response"].append(recordTtfb)
+            self._sessions[origin] = (poolSize, session)
+            # 旧 Session 上仍在进行的请求不受影响, 由 GC 回收其连接
+            return session
+
+    def close(self):
+        with self._lock:
+            for _, session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+sessions = SessionPool()
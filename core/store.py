@@ -0,0 +1,74 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+from threading import get_ident
+from typing import Callable
+
+FICLONE = 0x40049409    # Linux ioctl: 整文件写时复制 (btrfs / xfs / bcachefs)
+
+
+def reflink(src: Path, dst: Path):
+    """写时复制克隆, 文件系统不支持时抛出 OSError"""
+    if sys.platform != "linux": raise OSError("reflink 仅支持 Linux")
+    import fcntl
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+class ObjectStore:
+    """
+    按 SHA1 寻址的全局对象库: 多个 .minecraft 目录共用同一份资源文件 / 依赖库,
+    实例中的文件优先以硬链接引用库中对象, 其次写时复制 (reflink), 都不支持时复制
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def path(self, sha1: str) -> Path:
+        return self.root / sha1[:2] / sha1
+
+    def _place(self, src: Path, dst: Path) -> str:
+        """先在目标目录生成临时文件再原子替换, 返回使用的方式"""
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f".{dst.name}.{os.getpid()}.{get_ident()}.link")
+        try:
+            try:
+                os.link(src, tmp)
+                method = "link"
+            except OSError:
+                try:
+                    reflink(src, tmp)
+                    method = "reflink"
+                except OSError:
+                    shutil.copyfile(src, tmp)
+                    method = "copy"
+            os.replace(tmp, dst)
+        except BaseException:
+            try: os.unlink(tmp)
+            except OSError: ...
+            raise
+        return method
+
+    def place(self, sha1: str, target: Path, size: int = None, verify: Callable[[Path, str], bool] = None) -> str | None:
+        """
+        库中已有该对象时放到 target, 返回使用的方式 (link / reflink / copy);
+        对象不存在 / 大小不符 / 校验失败 / 文件系统出错时返回 None, 由调用方正常下载;
+        大小不符或校验失败的对象已损坏, 直接删除, 下载完成后由 adopt 重新收入
+        """
+        obj = self.path(sha1)
+        try:
+            if (size is not None and obj.stat().st_size != size) or (verify and not verify(obj, sha1)):
+                obj.unlink(missing_ok=True)
+                return None
+            return self._place(obj, Path(target))
+        except OSError:
+            return None
+
+    def adopt(self, path: Path, sha1: str):
+        """把已校验的文件收入对象库, 已存在时不做任何事; 出错时忽略, 不影响安装"""
+        obj = self.path(sha1)
+        if obj.exists(): return
+        try:
+            self._place(Path(path), obj)
+        except OSError: ...
@@ -0,0 +1,196 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from threading import Lock, get_ident
+
+
+@dataclass(slots=True)
+class Transfer:
+    """单个文件的一次下载 (含重试) 的计时与结果, 时间单位为秒"""
+    url: str
+    path: str
+    origin: str | None = None
+    protocol: str | None = None     # 最后一次请求使用的协议, 如 HTTP/1.1 / HTTP/2
+    size: int | None = None
+    status: str = "fail"        # ok / skip (已存在) / link (对象库) / fail
+    bytes: int = 0              # 实际接收的字节数
+    retries: int = 0
+    dns: float | None = None    # 仅异步引擎可单独测得, 线程引擎的 DNS 计入 connect
+    connect: float | None = None    # 新建连接 (含 TLS) 的耗时, 复用长连接时为空
+    ttfb: float | None = None   # 发出请求到收到响应头
+    verify: float = 0           # 校验已有文件哈希的耗时
+    error: str | None = None    # 最后一次失败的原因
+    start: float = field(default_factory=time.monotonic)
+    end: float | None = None
+    thread: int = field(default_factory=get_ident)
+
+    @property
+    def total(self) -> float:
+        return (self.end or time.monotonic()) - self.start
+
+    def finish(self):
+        self.end = time.monotonic()
+
+
+# 当前线程 / 协程正在进行的传输, 供连接池与 HTTP 客户端补充连接与首字节耗时
+currentTransfer: ContextVar[Transfer | None] = ContextVar("currentTransfer", default=None)
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values: return 0
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+@dataclass(slots=True)
+class TransferStats:
+    transfers: int = 0
+    completed: int = 0
+    skipped: int = 0
+    linked: int = 0
+    failed: int = 0
+    retries: int = 0
+    bytes: int = 0
+    connects: int = 0
+    connectTime: float = 0
+    verifyTime: float = 0
+    networkTime: float = 0      # 各次下载耗时之和, 并发时大于实际经过时间
+    ttfbP50: float = 0
+    ttfbP95: float = 0
+    totalP50: float = 0
+    totalP95: float = 0
+    errors: dict[str, int] = field(default_factory=dict)
+    origins: dict[str, int] = field(default_factory=dict)
+    protocols: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        """单条连接的平均吞吐 (字节/秒)"""
+        return self.bytes / self.networkTime if self.networkTime > 0 else 0
+
+    def __str__(self) -> str:
+        text = (f"传输 {self.completed} · 跳过 {self.skipped + self.linked} · 失败 {self.failed} · 重试 {self.retries}"
+                f"  |  TTFB p50 {self.ttfbP50 * 1000:.0f} ms / p95 {self.ttfbP95 * 1000:.0f} ms"
+                f"  |  单文件 p50 {self.totalP50 * 1000:.0f} ms / p95 {self.totalP95 * 1000:.0f} ms"
+                f"  |  新建连接 {self.connects} ({self.connectTime:.2f} s) · 校验 {self.verifyTime:.2f} s"
+                f" · 单连接 {self.throughput / 1048576:.2f} MB/s")
+        if set(self.protocols) - {"HTTP/1.1"}:
+            text += "  |  " + " · ".join(f"{k} ×{v}" for k, v in sorted(self.protocols.items()))
+        if self.errors:
+            text += "  |  错误 " + ", ".join(f"{k} ×{v}" for k, v in sorted(self.errors.items(), key=lambda e: -e[1])[:3])
+        return text
+
+
+class Trace:
+    """
+    单次安装的性能追踪: 记录每次传输与各阶段 (网络 / 磁盘 / 校验 / 界面) 的耗时,
+    可导出为 JSON Lines 或 Chrome Trace (chrome://tracing, Perfetto)
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.start = time.monotonic()
+        self.wallStart = time.time()
+        self.transfers: list[Transfer] = []
+        self.spans: list[tuple[str, str, float, float, int]] = []    # (名称, 类别, 开始, 结束, 线程)
+        self._lock = Lock()
+
+    def add(self, transfer: Transfer):
+        with self._lock:
+            self.transfers.append(transfer)
+
+    def addSpan(self, name: str, category: str, start: float, end: float):
+        with self._lock:
+            self.spans.append((name, category, start, end, get_ident()))
+
+    @contextmanager
+    def span(self, name: str, category: str = "install"):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.addSpan(name, category, start, time.monotonic())
+
+    def stats(self) -> TransferStats:
+        with self._lock:
+            transfers = list(self.transfers)
+        stats = TransferStats(transfers=len(transfers))
+        ttfb, totals = [], []
+        for t in transfers:
+            if t.status == "ok": stats.completed += 1
+            elif t.status == "skip": stats.skipped += 1
+            elif t.status == "link": stats.linked += 1
+            else: stats.failed += 1
+            stats.retries += t.retries
+            stats.verifyTime += t.verify
+            if t.connect is not None:
+                stats.connects += 1
+                stats.connectTime += t.connect + (t.dns or 0)
+            if t.error:
+                kind = t.error.split(":")[0]
+                stats.errors[kind] = stats.errors.get(kind, 0) + 1
+            if t.status in ("ok", "fail"):
+                stats.bytes += t.bytes
+                stats.networkTime += t.total
+                totals.append(t.total)
+                if t.origin: stats.origins[t.origin] = stats.origins.get(t.origin, 0) + 1
+                if t.protocol: stats.protocols[t.protocol] = stats.protocols.get(t.protocol, 0) + 1
+            if t.ttfb is not None: ttfb.append(t.ttfb)
+        ttfb.sort()
+        totals.sort()
+        stats.ttfbP50, stats.ttfbP95 = percentile(ttfb, 0.5), percentile(ttfb, 0.95)
+        stats.totalP50, stats.totalP95 = percentile(totals, 0.5), percentile(totals, 0.95)
+        return stats
+
+    def exportJsonl(self, path: Path):
+        """每行一个事件: 阶段 (span) 或传输 (transfer), 时间为相对安装开始的秒数"""
+        with self._lock:
+            transfers, spans = list(self.transfers), list(self.spans)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"type": "trace", "name": self.name, "wallStart": self.wallStart}, ensure_ascii=False) + "\n")
+            for name, category, start, end, thread in spans:
+                f.write(json.dumps({
+                    "type": "span", "name": name, "category": category, "start": start - self.start,
+                    "duration": end - start, "thread": thread
+                }, ensure_ascii=False) + "\n")
+            for t in transfers:
+                row = asdict(t)
+                row.update(type="transfer", start=t.start - self.start, end=t.end and t.end - self.start, total=t.total)
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def exportChrome(self, path: Path):
+        """
+        Chrome Trace Event 格式: 进程 1 为安装阶段, 进程 2 为传输;
+        异步引擎的传输都在同一线程上, 因此按时间重叠情况分配到互不重叠的通道显示
+        """
+        with self._lock:
+            transfers, spans = list(self.transfers), list(self.spans)
+        us = lambda t: round((t - self.start) * 1e6)
+        events = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": f"安装 {self.name}"}},
+            {"name": "process_name", "ph": "M", "pid": 2, "args": {"name": "传输"}}
+        ]
+        for name, category, start, end, thread in spans:
+            events.append({"name": name, "cat": category, "ph": "X", "ts": us(start), "dur": us(end) - us(start),
+                           "pid": 1, "tid": thread})
+        lanes: list[float] = []     # 每个通道上一次传输的结束时间
+        for t in sorted(transfers, key=lambda t: t.start):
+            end = t.end or time.monotonic()
+            lane = next((i for i, free in enumerate(lanes) if free <= t.start), len(lanes))
+            if lane == len(lanes): lanes.append(end)
+            else: lanes[lane] = end
+            events.append({
+                "name": os.path.basename(t.path), "cat": t.status, "ph": "X", "ts": us(t.start),
+                "dur": us(end) - us(t.start), "pid": 2, "tid": lane,
+                "args": {k: v for k, v in asdict(t).items() if k not in ("start", "end", "thread") and v is not None}
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+    def export(self, path: Path):
+        """按扩展名选择格式: .jsonl 为 JSON Lines, 其他为 Chrome Trace"""
+        if str(path).endswith(".jsonl"): self.exportJsonl(path)
+        else: self.exportChrome(path)
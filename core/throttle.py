@@ -0,0 +1,121 @@
+import math
+import time
+from threading import Lock
+from typing import Callable
+
+
+class TokenBucket:
+    """全局带宽限制: 每接收一块数据扣除对应令牌, 透支时由调用方等待补足"""
+
+    def __init__(self, rate: float = 0):
+        """:param rate: 字节/秒, 0 表示不限速"""
+        self._lock = Lock()
+        self.rate = 0
+        self.burst = self.tokens = 65536
+        self.last = time.monotonic()
+        self.setRate(rate)
+
+    def setRate(self, rate: float):
+        """
+        修改限速, 速率不变时不做任何事; 每次创建安装引擎都会调用,
+        不能重新补满令牌, 否则正在限速的下载每次都多得一次突发
+        """
+        with self._lock:
+            rate = max(0, rate)
+            if rate == self.rate: return
+            now = time.monotonic()
+            # 原来限速时按旧速率结算令牌 (保留欠账), 原来不限速时从满令牌开始
+            tokens = min(self.burst, self.tokens + (now - self.last) * self.rate) if self.rate > 0 else math.inf
+            self.rate = rate
+            self.burst = max(rate / 4, 65536)    # 允许约 0.25 秒的突发
+            self.tokens = min(tokens, self.burst)
+            self.last = now
+
+    def reserve(self, n: int) -> float:
+        """扣除 n 字节的令牌, 返回调用方需要等待的秒数"""
+        with self._lock:
+            if self.rate <= 0: return 0
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate) - n
+            self.last = now
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def consume(self, n: int):
+        if (delay := self.reserve(n)) > 0: time.sleep(delay)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 并发控制: 每个采样窗口内出错率高于基线或延迟明显上升且吞吐不再增长时并发数乘性下降,
+    否则只要吞吐没有下降就加性增长, 吞吐下降但无拥塞信号时保持不变
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 2, maximum: int = 128, interval: float = 0.5,
+                 errorThreshold: float = 0.05, latencyFactor: float = 3, decrease: float = 0.7,
+                 onChange: Callable[[int], None] = None):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.interval = interval
+        self.errorThreshold = errorThreshold
+        self.latencyFactor = latencyFactor
+        self.decrease = decrease
+        self.onChange = onChange
+        self.baseLatency = None     # 观察到的最低窗口中位延迟, 作为无排队时的基准
+        self.baseErrorRate = None   # 出错率的滑动平均, 与并发无关的随机错误不视为拥塞
+        self.lastThroughput = 0
+        self._window = self._newWindow()
+        self._lock = Lock()
+
+    @staticmethod
+    def _newWindow() -> dict:
+        return {"start": time.monotonic(), "count": 0, "errors": 0, "bytes": 0, "latencies": []}
+
+    def setMaximum(self, maximum: int):
+        with self._lock:
+            self.maximum = max(self.minimum, maximum)
+            changed = self.limit > self.maximum
+            self.limit = min(self.limit, self.maximum)
+        if changed and self.onChange: self.onChange(self.limit)
+
+    def record(self, ok: bool, seconds: float = 0, size: int = 0):
+        """记录一次请求结果 (失败包括超时与错误状态码), 窗口到期时调整并发数"""
+        with self._lock:
+            window = self._window
+            window["count"] += 1
+            if ok:
+                window["bytes"] += size or 0
+                window["latencies"].append(seconds)
+            else:
+                window["errors"] += 1
+            elapsed = time.monotonic() - window["start"]
+            # 样本太少时延长窗口, 避免偶发错误造成误判
+            if elapsed < self.interval or (window["count"] < 10 and elapsed < self.interval * 4): return
+            self._window = self._newWindow()
+            old = self.limit
+            self._adjust(window, elapsed)
+            changed = self.limit != old
+        if changed and self.onChange: self.onChange(self.limit)
+
+    def _adjust(self, window: dict, elapsed: float):
+        throughput = window["bytes"] / elapsed
+        latencies = sorted(window["latencies"])
+        median = latencies[len(latencies) // 2] if latencies else None
+        if median is not None:
+            self.baseLatency = median if self.baseLatency is None else min(self.baseLatency * 1.05, median)
+        count = window["count"]
+        errorRate = window["errors"] / count
+        base = errorRate if self.baseErrorRate is None else self.baseErrorRate
+        # 允许的波动取固定阈值与两倍抽样标准差中的较大者
+        congested = errorRate > base + max(self.errorThreshold, 2 * math.sqrt(base * (1 - base) / count)) or (
+            median is not None and median > self.baseLatency * self.latencyFactor and throughput <= self.lastThroughput
+        )
+        self.baseErrorRate = base + 0.1 * (errorRate - base)
+        if congested:
+            self.limit = max(self.minimum, int(self.limit * self.decrease))
+        elif throughput >= self.lastThroughput * 0.95:
+            self.limit = min(self.maximum, self.limit + max(1, self.limit // 10))
+        self.lastThroughput = throughput
+
+
+bandwidth = TokenBucket()
@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+
+class Url:
+    def __init__(self, url: str | Path):
+        if isinstance(url, str):
+            self.url = url
+        elif isinstance(url, Path):
+            self.url = str(url)
+        elif isinstance(url, Url):
+            self.url = url.url
+        else:
+            raise TypeError
+
+    def __str__(self):
+        return self.url
+
+    def __divmod__(self, other):
+        return Url(self.url + f"/{other}")
+
+    def __truediv__(self, other):
+        return Url(self.url + f"/{other}")
+
+    __repr__ = __str__
+
+@dataclass(slots=True)
+class UrlOrigin:
+    Versions: Url
+    Assets: Url
+    Library: Url
+
+
+LAN_PORT = 25580
+
+
+def lanOrigin(base: str) -> UrlOrigin:
+    """局域网缓存服务器的地址布局 (与 BMCLAPI 相同): 版本文件在根路径, 资源文件在 /assets, 依赖库在 /maven"""
+    base = base.rstrip("/")
+    return UrlOrigin(Url(base), Url(base + "/assets"), Url(base + "/maven"))
+
+
+def setLanOrigin(base: str):
+    """修改局域网缓存地址, 原地更新 ORIGINS["Lan"], 引用同一对象的设置选项随之生效"""
+    origin = lanOrigin(base)
+    for name in ("Versions", "Assets", "Library"):
+        getattr(ORIGINS["Lan"], name).url = getattr(origin, name).url
+
+
+# 内置下载源, 设置中的下载源选项与命令行共用
+ORIGINS = {
+    "Official": UrlOrigin(
+        Url("https://piston-meta.mojang.com"),
+        Url("https://resources.download.minecraft.net"),
+        Url("https://libraries.minecraft.net")
+    ),
+    "BmclApi": UrlOrigin(
+        Url("https://bmclapi2.bangbang93.com"),
+        Url("https://bmclapi2.bangbang93.com/assets"),
+        Url("https://bmclapi2.bangbang93.com/maven")
+    ),
+    "Lan": lanOrigin(f"http://127.0.0.1:{LAN_PORT}")
+}
@@ -0,0 +1,51 @@
+import time
+from collections import deque
+from pathlib import Path
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+
+class LogModel(QAbstractListModel):
+    """环形缓冲日志模型: 只保留最近 capacity 行, 连续的单文件日志合并为一行, 可选把完整历史写入文件"""
+
+    def __init__(self, capacity: int = 2000, parent=None):
+        super().__init__(parent)
+        self.capacity = max(1, capacity)
+        self._rows: deque[list] = deque()    # [文本, 合并键, 合并行数]
+        self._spill = None
+
+    def setSpillFile(self, path: Path | None):
+        if self._spill: self._spill.close()
+        self._spill = None
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._spill = open(path, "a", encoding="utf-8", buffering=1)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid(): return None
+        text, _, count = self._rows[index.row()]
+        return f"{text} 等 {count} 个文件" if count > 1 else text
+
+    def append(self, text: str, batchKey: str = None):
+        if self._spill: self._spill.write(f"{time.strftime('%H:%M:%S')} {text}\n")
+        if batchKey is not None and self._rows and self._rows[-1][1] == batchKey:
+            row = self._rows[-1]
+            row[0], row[2] = text, row[2] + 1
+            index = self.index(len(self._rows) - 1)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole])
+            return
+        if len(self._rows) >= self.capacity:
+            self.beginRemoveRows(QModelIndex(), 0, 0)
+            self._rows.popleft()
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows))
+        self._rows.append([text, batchKey, 1])
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows.clear()
+        self.endResetModel()
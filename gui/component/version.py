@@ -0,0 +1,115 @@
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QSize, QRect, QEvent, Signal
+from PySide6.QtGui import QColor, QPainter, QFont
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle
+from qfluentwidgets import FluentIcon as FIF, isDarkTheme
+
+URL_ROLE = Qt.UserRole
+TIME_ROLE = Qt.UserRole + 1
+SHA1_ROLE = Qt.UserRole + 2
+
+
+class VersionModel(QAbstractListModel):
+    """全部版本的唯一数据模型, 发布时间预先格式化, 并为搜索预建小写索引串"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._buckets: dict[str, list[tuple]] = {}
+        self._rows: list[tuple] = []    # (id, 类型, 时间, url, 分类, sha1)
+        self.keys: list[str] = []       # 与 _rows 一一对应的搜索索引
+        self.categories: list[str] = []
+
+    def setBucket(self, category: str, versions: list[dict]):
+        self._buckets[category] = [(
+            v["id"], v["type"], v["releaseTime"].replace("-", "/").replace("T", " ").replace("+00:00", ""),
+            v["url"], category, v.get("sha1")
+        ) for v in versions]
+        self.beginResetModel()
+        self._rows = [row for bucket in self._buckets.values() for row in bucket]
+        self.keys = [f"{_id}\n{_type}\n{_time}".lower() for _id, _type, _time, *_ in self._rows]
+        self.categories = [row[4] for row in self._rows]
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole: return row[0]
+        if role == TIME_ROLE: return row[2]
+        if role == URL_ROLE: return row[3]
+        if role == SHA1_ROLE: return row[5]
+        return None
+
+
+class VersionFilterModel(QSortFilterProxyModel):
+    """按分类与搜索词过滤, 每行只做一次子串查找"""
+
+    def __init__(self, category: str, source: VersionModel, parent=None):
+        super().__init__(parent)
+        self.category = category
+        self.query = ""
+        self.setSourceModel(source)
+
+    def setQuery(self, query: str):
+        self.query = query.strip().lower()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, row: int, parent: QModelIndex) -> bool:
+        source: VersionModel = self.sourceModel()
+        return source.categories[row] == self.category and self.query in source.keys[row]
+
+
+class VersionDelegate(QStyledItemDelegate):
+    """直接绘制版本卡片, 视图只为可见行调用 paint, 无需为每个版本创建控件"""
+    downloadClicked = Signal(str, str, object)     # 版本号, 地址, 版本 JSON 的 SHA1
+
+    HEIGHT = 76
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(option.rect.width(), self.HEIGHT)
+
+    @staticmethod
+    def buttonRect(rect: QRect) -> QRect:
+        return QRect(rect.right() - 131, rect.center().y() - 16, 120, 32)
+
+    def paint(self, painter: QPainter, option, index: QModelIndex):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        dark = isDarkTheme()
+        rect = option.rect.adjusted(0, 3, -6, -3)
+        hover = option.state & QStyle.State_MouseOver
+
+        painter.setPen(QColor(255, 255, 255, 13) if dark else QColor(0, 0, 0, 19))
+        painter.setBrush(QColor(255, 255, 255, 21 if hover else 13) if dark else QColor(255, 255, 255, 255 if hover else 170))
+        painter.drawRoundedRect(rect, 5, 5)
+
+        FIF.GAME.icon().paint(painter, QRect(rect.left() + 20, rect.center().y() - 20, 40, 40))
+
+        font = QFont(option.font)
+        font.setPixelSize(14)
+        painter.setFont(font)
+        painter.setPen(QColor(255, 255, 255) if dark else QColor(0, 0, 0))
+        textRect = QRect(rect.left() + 75, rect.top(), rect.width() - 220, rect.height() // 2)
+        painter.drawText(textRect, Qt.AlignLeft | Qt.AlignBottom, index.data(Qt.DisplayRole))
+        font.setPixelSize(12)
+        painter.setFont(font)
+        painter.setPen(QColor("#d2d2d2") if dark else QColor("#606060"))
+        painter.drawText(textRect.translated(0, rect.height() // 2), Qt.AlignLeft | Qt.AlignTop, index.data(TIME_ROLE))
+
+        button = self.buttonRect(rect)
+        painter.setPen(QColor(255, 255, 255, 20) if dark else QColor(0, 0, 0, 25))
+        painter.setBrush(QColor(255, 255, 255, 15) if dark else QColor(255, 255, 255, 220))
+        painter.drawRoundedRect(button, 5, 5)
+        font.setPixelSize(14)
+        painter.setFont(font)
+        painter.setPen(QColor(255, 255, 255) if dark else QColor(0, 0, 0))
+        painter.drawText(button, Qt.AlignCenter, "下载")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton \
+                and self.buttonRect(option.rect.adjusted(0, 3, -6, -3)).contains(event.position().toPoint()):
+            self.downloadClicked.emit(index.data(Qt.DisplayRole), index.data(URL_ROLE), index.data(SHA1_ROLE))
+            return True
+        return False
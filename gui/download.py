@@ -1,19 +1,15 @@
-import json
-import os
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from threading import Thread
 
-import requests
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QStackedWidget, QHBoxLayout, QLabel, QSizePolicy
-from qfluentwidgets import (SingleDirectionScrollArea, FluentIcon as FIF,
-                            Pivot, ToolButton, LineEdit, ProgressBar, BodyLabel)
+from PySide6.QtCore import Qt, Signal, QTimer
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QStackedWidget, QHBoxLayout, QFileDialog
+from qfluentwidgets import FluentIcon as FIF, Pivot, ToolButton, LineEdit, ProgressBar, BodyLabel, ListView, PushButton
 
-from config import cfg, Url
-from .component.card import Card
-from .logic import fileSha1
+from config import cfg, Config
+from core import OriginRouter, Progress, ProgressSnapshot, InstallOptions, InstallListener, Installer
+from .component.version import URL_ROLE, SHA1_ROLE, VersionModel, VersionFilterModel, VersionDelegate
+from .component.log import LogModel
 
 
 class BaseVersionPage(QWidget):
@@ -21,117 +17,155 @@ class BaseVersionPage(QWidget):
         super().__init__(parent=parent)
         self.setObjectName(_type.capitalize() + "VersionPage")
         self._type = _type
-        self._count = 0
-        _p = self.parent().parent()
         _d = self.parent().downloadVersion
-        self.d = lambda url, ver: Thread(target=_d, args=(url, ver)).start()
-        self._v = getattr(_p, f"{self._type[0].lower()}{self._type[1:]}Version")
-        getattr(_p, f"update{_type.capitalize()}").connect(self.updateData)     # 更想数据时重新绘制
+        self.d = lambda ver, url, sha1: Thread(target=_d, args=(ver, url, sha1)).start()
+        self.prefetch = self.parent().prefetchVersions
+        _p = self.parent().parent()
+        self.versionModel = self.parent().versionModel
+        getattr(_p, f"update{_type.capitalize()}").connect(self.updateData)     # 更新数据时重建索引
+        self.versionModel.setBucket(_type, list(getattr(_p, f"{self._type}Version")))
+        self.model = VersionFilterModel(_type, self.versionModel, self)
         self.initUI()
 
     def initUI(self):
         mainLayout = QVBoxLayout()
 
-        self.scrollArea = SingleDirectionScrollArea()
-        self.scrollArea.verticalScrollBar().valueChanged.connect(self.on_scroll)
-        self.scrollArea.setStyleSheet("background-color: rgba(255, 255, 255, 0)")
-
-        self.contentWidget = QWidget()
-        self.contentLayout = QVBoxLayout(self.contentWidget)
-
-        self.refresh_content()
-
-        self.scrollArea.setWidget(self.contentWidget)
-        self.scrollArea.setWidgetResizable(True)
-        mainLayout.addWidget(self.scrollArea)
+        self.listView = ListView()
+        self.listView.setModel(self.model)
+        self.listView.setUniformItemSizes(True)    # 只布局和绘制可见行
+        self.listView.setMouseTracking(True)
+        self.listView.setSelectionMode(ListView.NoSelection)
+        self.listView.setStyleSheet("background-color: rgba(255, 255, 255, 0)")
+        self.delegate = VersionDelegate(self.listView)
+        self.delegate.downloadClicked.connect(self.d)
+        self.listView.setItemDelegate(self.delegate)
+
+        # 滚动 / 数据变化停止片刻后预取可见版本
+        self.prefetchTimer = QTimer(self)
+        self.prefetchTimer.setSingleShot(True)
+        self.prefetchTimer.setInterval(300)
+        self.prefetchTimer.timeout.connect(self.prefetchVisible)
+        self.listView.verticalScrollBar().valueChanged.connect(self.prefetchTimer.start)
+        self.model.modelReset.connect(self.prefetchTimer.start)
+        self.model.layoutChanged.connect(self.prefetchTimer.start)
+
+        mainLayout.addWidget(self.listView)
         self.setLayout(mainLayout)
 
-    def on_scroll(self, value):
-        """滚动事件处理"""
-        # 判断是否滚动到底部（留20%缓冲区域）
-        scroll_height = self.scrollArea.verticalScrollBar().maximum()
-        if value > scroll_height * 0.9 and len(self._v) - self._count:
-            for _ in self._v[self._count:self._count+5]:
-                self._count += 1
-                card = Card(FIF.GAME, _["id"], _["releaseTime"].replace("-", "/").replace("T", " ").replace("+00:00", ""), _["url"], self.d)
-                self.contentLayout.addWidget(card)
-
     def updateData(self, data):
-        self._v = data
-        self.refresh_content()
-
-    def refresh_content(self):
-        """根据数据状态重新渲染内容"""
-        while self.contentLayout.count() > 0:
-            item = self.contentLayout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        if not self._v:
-            # 显示占位卡片
-            placeholder = Card(FIF.GAME, "0", "1999/12/31 23:59")
-            self.contentLayout.addWidget(placeholder)
-        else:
-            # 渲染前15条数据
-            for item in self._v[:15]:
-                self._count += 1
-                card = Card(
-                    FIF.GAME,
-                    item["id"],
-                    item["releaseTime"].replace("-", "/").replace("T", " ").replace("+00:00", ""),
-                    item["url"],
-                    self.d
-                )
-                self.contentLayout.addWidget(card)
+        self.versionModel.setBucket(self._type, data)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.prefetchTimer.start()
+
+    def prefetchVisible(self):
+        if not self.isVisible(): return
+        viewport = self.listView.viewport().rect()
+        first = self.listView.indexAt(viewport.topLeft())
+        if not first.isValid(): return
+        last = self.listView.indexAt(viewport.bottomLeft())
+        end = last.row() if last.isValid() else self.model.rowCount() - 1
+        self.prefetch([(
+            self.model.index(row, 0).data(URL_ROLE), self.model.index(row, 0).data(SHA1_ROLE)
+        ) for row in range(first.row(), end + 1)])
+
+    def search(self, text: str):
+        self.model.setQuery(text)
 
 class DownloadInfoPage(QWidget):
-    totalFile = Signal(int)
-    addFile = Signal()
+    trackProgress = Signal(object)
 
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self.setObjectName("DownloadInfoPage")
-        self.file = 0
-        self.totalFile.connect(self._totalFile)
-        self.addFile.connect(self._addFile)
+        self.progresses: list[Progress] = []
+        self.trackProgress.connect(self._trackProgress)
 
-        self.initUI()
+        # 定时采样进度计数器, 避免每个文件触发一次重绘
+        self.progressTimer = QTimer(self)
+        self.progressTimer.setInterval(100)
+        self.progressTimer.timeout.connect(self.refreshProgress)
 
-    def _addFile(self):
-        self.file += 1
-        total = self.totalFileBar.maximum()
-        self.totalFilePercentText.setText(f"{self.file/total*100:.2f}% ({self.file}/{total})")
-        self.totalFileBar.setValue(self.file)
+        self.initUI()
 
-    def _totalFile(self, total: int):
-        self.totalFilePercentText.setText(f"{self.file/max(1, total)*100:.2f}% ({self.file}/{max(1, total)})")
+    def _trackProgress(self, progress: Progress):
+        if all(p.finished for p in self.progresses): self.progresses.clear()
+        self.progresses.append(progress)
+        self.progressTimer.start()
+
+    def refreshProgress(self):
+        start = time.monotonic()
+        snapshot = sum((p.snapshot() for p in self.progresses), ProgressSnapshot())
+        done = min(snapshot.bytes + snapshot.skippedBytes, snapshot.totalBytes)
+        self.downloadFilePercentText.setText(
+            f"{snapshot.stage}  {done / 1048576:.1f}/{snapshot.totalBytes / 1048576:.1f} MB"
+            f"  {snapshot.speed / 1048576:.2f} MB/s"
+        )
+        self.downloadFileBar.setRange(0, max(1, snapshot.totalBytes >> 10))
+        self.downloadFileBar.setValue(done >> 10)
+
+        total = max(1, snapshot.totalFiles)
+        self.totalFilePercentText.setText(
+            f"{snapshot.files/total*100:.2f}% ({snapshot.files}/{total})"
+            + (f"  跳过 {snapshot.skipped}" if snapshot.skipped else "")
+            + (f"  失败 {snapshot.failed}" if snapshot.failed else "")
+        )
         self.totalFileBar.setRange(0, total)
-        self.totalFileBar.setValue(0)
+        self.totalFileBar.setValue(snapshot.files)
+
+        trace = self.progresses[-1].trace if self.progresses else None
+        if trace:
+            self.telemetryText.setText(str(trace.stats()))
+            trace.addSpan("刷新进度", "gui", start, time.monotonic())
+        if all(p.finished for p in self.progresses): self.progressTimer.stop()
+
+    def exportTrace(self, suffix: str):
+        """导出最近一次安装的追踪, .jsonl 为 JSON Lines, .json 为 Chrome Trace"""
+        trace = self.progresses[-1].trace if self.progresses else None
+        if trace is None: return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出性能追踪", f"trace-{trace.name}-{time.strftime('%Y%m%d-%H%M%S')}{suffix}", f"*{suffix}"
+        )
+        if not path: return
+        trace.export(Path(path))
+        self.logModel.append(f"📄 性能追踪已导出: {path}")
+
+    def updateLogSpill(self, enabled: bool):
+        path = Path(cfg.tempPath.value) / "MinecraftLauncherDemo" / "logs" / f"download-{time.strftime('%Y%m%d')}.log"
+        self.logModel.setSpillFile(path if enabled else None)
+
+    def scrollLogToBottom(self):
+        bar = self.logView.verticalScrollBar()
+        if bar.value() >= bar.maximum() - 2 * self.logView.sizeHintForRow(0):    # 用户向上翻看时不打断
+            self.logView.scrollToBottom()
 
     def initUI(self):
         self.mainLayout = QVBoxLayout()
 
         # 下载信息
-        self.scrollArea = SingleDirectionScrollArea()
-        self.contentWidget = QWidget()
-        self.contentLayout = QVBoxLayout(self.contentWidget)
-        self.scrollArea.setStyleSheet("background-color: transparent")
-        self.scrollArea.setWidgetResizable(True)
-        self.contentLayout.addStretch()
-        self.scrollArea.setWidget(self.contentWidget)
-        self.mainLayout.addWidget(self.scrollArea)
+        self.logModel = LogModel(cfg.logCapacity.value, self)
+        self.updateLogSpill(cfg.logSpill.value)
+        cfg.logSpill.valueChanged.connect(self.updateLogSpill)
+        self.logView = ListView()
+        self.logView.setModel(self.logModel)
+        self.logView.setUniformItemSizes(True)     # 行高一致, 视图只布局可见行
+        self.logView.setStyleSheet("background-color: transparent")
+        self.logModel.rowsInserted.connect(self.scrollLogToBottom)
+        self.mainLayout.addWidget(self.logView)
 
         # 文件下载进度
         self.downloadFileLayout = QVBoxLayout()
         # 文字
         self.downloadFileTextLayout = QHBoxLayout()
         self.downloadFileInfoText = BodyLabel(f"下载进度")
-        self.downloadFilePercentText = BodyLabel(f"版本文件下载(1/4)")
+        self.downloadFilePercentText = BodyLabel(f"0.0/0.0 MB")
         self.downloadFileTextLayout.addWidget(self.downloadFileInfoText)
         self.downloadFileTextLayout.addStretch()
         self.downloadFileTextLayout.addWidget(self.downloadFilePercentText)
         # 进度条
         self.downloadFileBar = ProgressBar()
-        self.downloadFileBar.setRange(0, 384)
+        self.downloadFileBar.setRange(0, 1)
         self.downloadFileBar.setValue(0)
         self.downloadFileLayout.addLayout(self.downloadFileTextLayout)
         self.downloadFileLayout.addWidget(self.downloadFileBar)
@@ -141,30 +175,66 @@ class DownloadInfoPage(QWidget):
         # 文字
         self.totalFileTextLayout = QHBoxLayout()
         self.totalFileInfoText = BodyLabel(f"文件总数")
-        self.totalFilePercentText = BodyLabel(f"{180/384*100:.2f}% (180/384)")
+        self.totalFilePercentText = BodyLabel(f"0.00% (0/0)")
         self.totalFileTextLayout.addWidget(self.totalFileInfoText)
         self.totalFileTextLayout.addStretch()
         self.totalFileTextLayout.addWidget(self.totalFilePercentText)
         # 进度条
         self.totalFileBar = ProgressBar()
-        self.totalFileBar.setRange(0, 384)
+        self.totalFileBar.setRange(0, 1)
         self.totalFileBar.setValue(0)
         self.totalFileLayout.addLayout(self.totalFileTextLayout)
         self.totalFileLayout.addWidget(self.totalFileBar)
 
         # self.mainLayout.addStretch()
+        # 传输统计
+        self.telemetryLayout = QHBoxLayout()
+        self.telemetryText = BodyLabel("")
+        self.telemetryText.setWordWrap(True)
+        exportJsonl = PushButton("导出 JSONL")
+        exportJsonl.clicked.connect(lambda: self.exportTrace(".jsonl"))
+        exportChrome = PushButton("导出 Chrome Trace")
+        exportChrome.clicked.connect(lambda: self.exportTrace(".json"))
+        self.telemetryLayout.addWidget(self.telemetryText, 1)
+        self.telemetryLayout.addWidget(exportJsonl)
+        self.telemetryLayout.addWidget(exportChrome)
+
         self.mainLayout.addLayout(self.downloadFileLayout)
         self.mainLayout.addLayout(self.totalFileLayout)
+        self.mainLayout.addLayout(self.telemetryLayout)
 
         self.setLayout(self.mainLayout)
 
+class DownloadListener(InstallListener):
+    """把安装引擎的回调转发为界面信号"""
+
+    def __init__(self, page: "DownloadPage"):
+        self.page = page
+
+    def info(self, text: str):
+        self.page.addInfoToDownload.emit(text)
+
+    def fileInfo(self, text: str):
+        self.page.addFileInfoToDownload.emit(text)
+
+    def started(self, progress: Progress):
+        self.page.downloadInfoPage.trackProgress.emit(progress)
+
 class DownloadPage(QWidget):
     addInfoToDownload = Signal(str)
+    addFileInfoToDownload = Signal(str)
 
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self.setObjectName("DownloadPage")
         self.addInfoToDownload.connect(self._addInfoToDownload)
+        self.addFileInfoToDownload.connect(lambda info: self.downloadInfoPage.logModel.append(info, "file"))
+        self.origins = {origin.name: origin.value for origin in Config.VersionsOrigin}
+        # 局域网缓存本身会把没有的文件重定向到上游, 不参与竞速
+        self.router = OriginRouter({name: origin for name, origin in self.origins.items() if name != "Lan"})
+
+        self.versionModel = VersionModel(self)     # 三个版本页共用一个数据模型
+        self.prefetched: set[tuple[str, str]] = set()
 
         self.initUI()
 
@@ -175,9 +245,9 @@ class DownloadPage(QWidget):
         self.downloadInfoPage = DownloadInfoPage(self)
         # self.downloadInfoPage.contentLayout.addWidget(BodyLabel("AAA"))
 
-        self.addSubInterface(BaseVersionPage(self, "release"), "正式版")
-        self.addSubInterface(BaseVersionPage(self, "snapshot"), "预览版")
-        self.addSubInterface(BaseVersionPage(self, "old"), "远古版")
+        self.versionPages = [BaseVersionPage(self, "release"), BaseVersionPage(self, "snapshot"), BaseVersionPage(self, "old")]
+        for page, text in zip(self.versionPages, ("正式版", "预览版", "远古版")):
+            self.addSubInterface(page, text)
         # self.addSubInterface(BaseVersionPage(self, "aprFool"), "愚人节版")
 
         mainLayout = QVBoxLayout()
@@ -190,6 +260,7 @@ class DownloadPage(QWidget):
         searchEdit.setPlaceholderText("搜索版本...")
         searchEdit.setClearButtonEnabled(True)
         searchEdit.setFocusPolicy(Qt.StrongFocus)
+        searchEdit.textChanged.connect(lambda text: [page.search(text) for page in self.versionPages])
 
         self.stackedWidget.addWidget(self.downloadInfoPage)
         self.mainPivot._currentRouteKey = "ReleaseVersionPage"
@@ -213,99 +284,42 @@ class DownloadPage(QWidget):
             onClick=lambda: self.stackedWidget.setCurrentWidget(widget)
         )
 
-    def downloadVersion(self, ver, url: str):
-        baseDir = Path(cfg.minecraftPath.value)
-        versionDir = baseDir / "versions" / ver
-        assetsDir = baseDir / "assets"
-        librariesDir = baseDir / "libraries"
-
-        self.addInfoToDownload.emit(f"📁 创建目录结构: {ver}")
-        versionDir.mkdir(parents=True, exist_ok=True)
-        assetsDir.mkdir(parents=True, exist_ok=True)
-        librariesDir.mkdir(parents=True, exist_ok=True)
-
-        self.addInfoToDownload.emit(f"⬇️ 下载版本JSON文件: {url}")
-        self.downloadInfoPage.totalFile.emit(1)
-        self.downloadFile(url, versionDir / f"{ver}.json", url.split("/")[-2])
-        with open(versionDir / f"{ver}.json", "r", encoding="utf-8") as f:
-            verData = json.load(f)
-        self.downloadInfoPage.addFile.emit()
-
-        _client = verData['downloads']['client']
-        self.downloadInfoPage.totalFile.emit(1)
-        self.addInfoToDownload.emit(f"⬇️ 下载客户端JAR: {ver}.jar")
-        self.downloadFile(_client["url"], versionDir / f"{ver}.jar", _client["sha1"])
-        self.downloadInfoPage.addFile.emit()
-
-        assetIndex = verData["assetIndex"]
-        assetIndexPath = assetsDir / "indexes" / f"{assetIndex['id']}.json"
-        assetIndexPath.parent.mkdir(parents=True, exist_ok=True)
-        self.downloadInfoPage.totalFile.emit(1)
-        self.addInfoToDownload.emit(f"⬇️ 下载资源索引: {assetIndex['url']}")
-        self.downloadFile(assetIndex['url'], assetIndexPath, assetIndex["sha1"])
-        self.downloadInfoPage.addFile.emit()
-
-        self.addInfoToDownload.emit(f"⬇️ 开始下载资源文件")
-        with open(assetIndexPath, "r", encoding="utf-8") as f:
-            assetIndexData: dict = json.load(f)["objects"]
-        self.downloadInfoPage.totalFile.emit(len(assetIndexData))
-
-        with ThreadPoolExecutor(max_workers=cfg.downloadTask.value) as executor:
-            futures = []
-            for _, data in assetIndexData.items():
-                path = Path(data["hash"][:2]) / data["hash"]
-                futures.append(executor.submit(
-                    self.downloadFile,
-                    cfg.versionsOrigin.value.value.Assets / path,
-                    assetsDir / "objects" / path,
-                    data["hash"],
-                    False
-                ))
-
-            for future in as_completed(futures):
-                if not future.result()[0]:
-                    self.addInfoToDownload.emit(f"❌ 下载文件 {future.result()[1]} 时发生错误")
-                self.downloadInfoPage.addFile.emit()
-
-        self.addInfoToDownload.emit(f"✅ 资源文件下载完成")
-
-
-    def downloadFile(self, url: Url, path: Path, sha1: str = None, su: bool = True):
-        headResp = None
-        url = Url(url)
-        if isinstance(path, str): path = Path(path)
-
-        if path.exists():
-            if sha1 and fileSha1(path) == sha1:
-                if su: self.addInfoToDownload.emit(f"   ✓ 下载完成: {path.name}")
-                return True, path.name
-            try:
-                headResp = requests.head(url, timeout=cfg.downloadTimeout.value) if headResp is None else headResp
-                if headResp.status_code == 200:
-                    remote_size = int(headResp.headers.get('Content-Length', 0))
-                    if path.stat().st_size == remote_size:
-                        if su: self.addInfoToDownload.emit(f"   ✓ 下载完成: {path.name}")
-                        return True, path.name
-            except Exception: ...
-        path.parent.mkdir(parents=True, exist_ok=True)
-
-        for attempt in range(cfg.downloadCount.value):  # 重试
-            try:
-                headResp = requests.head(url, timeout=cfg.downloadTimeout.value) if headResp is None else headResp
-                if headResp.status_code != 200: raise ValueError("网络错误")
-                with requests.get(url, stream=True, timeout=cfg.downloadTimeout.value) as resp:
-                    resp.raise_for_status()
-                    with open(path, "wb") as f:
-                        for chunk in resp.iter_content(chunk_size=26_2144):    # 512KB (8192 * 32)
-                            if chunk: f.write(chunk)
-                if sha1:
-                    if sha1 != fileSha1(path): raise ValueError("SHA1 值不匹配")
-                if su: self.addInfoToDownload.emit(f"   ✓ 下载完成: {path.name}")
-                return True, path.name
-            except Exception as e:
-                print(e)
-        return False, path.name
-
-    def _addInfoToDownload(self, info: str, label: QLabel = BodyLabel):
-        self.downloadInfoPage.contentLayout.insertWidget(self.downloadInfoPage.contentLayout.count() - 1, label(info))
-        print(info)
+    def installer(self) -> Installer:
+        """按当前设置创建安装引擎, 下载源测速结果在多次安装间共用"""
+        options = InstallOptions(
+            Path(cfg.minecraftPath.value),
+            origin=cfg.versionsOrigin.value.name,
+            officialOrigin=Config.VersionsOrigin.Official.name,
+            threads=cfg.downloadTask.value,
+            adaptive=cfg.adaptiveConcurrency.value,
+            bandwidthLimit=cfg.bandwidthLimit.value * 125000,     # Mbps -> 字节/秒
+            timeout=cfg.downloadTimeout.value,
+            retries=cfg.downloadCount.value,
+            engine=cfg.downloadEngine.value,
+            asyncTasks=cfg.asyncTask.value,
+            originRace=cfg.originRace.value,
+            segments=cfg.downloadSegments.value,
+            segmentMinSize=cfg.segmentThreshold.value << 20,
+            indexPath=Path(cfg.tempPath.value) / "MinecraftLauncherDemo" / "verified.db",
+            metaCachePath=Path(cfg.tempPath.value) / "MinecraftLauncherDemo" / "meta",
+            storePath=Path(cfg.objectStorePath.value) if cfg.objectStore.value else None,
+            http2=cfg.http2.value
+        )
+        return Installer(self.origins, options, DownloadListener(self), self.router)
+
+    def downloadVersion(self, ver, url: str, sha1: str = None):
+        try:
+            self.installer().install(ver, url, sha1)
+        except Exception as e:     # 创建安装器失败 (如目录无法写入) 时写入日志, 不让下载线程静默退出
+            self.addInfoToDownload.emit(f"❌ 安装 {ver} 失败: {type(e).__name__}: {e}")
+
+    def prefetchVersions(self, versions: list[tuple[str, str]]):
+        """低优先级预取 (地址, SHA1) 对应的版本 JSON 与资源索引, 每个版本只预取一次"""
+        if not cfg.prefetchMeta.value: return
+        versions = [v for v in versions if v not in self.prefetched]
+        if not versions: return
+        self.prefetched.update(versions)
+        self.installer().prefetch(versions)
+
+    def _addInfoToDownload(self, info: str):
+        self.downloadInfoPage.logModel.append(info)
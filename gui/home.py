@@ -1,10 +1,105 @@
-from PySide6.QtWidgets import QWidget
+import os
+import time
+from pathlib import Path
+from threading import Thread
+
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout
+from qfluentwidgets import ComboBox, LineEdit, PrimaryPushButton, BodyLabel, SubtitleLabel, FluentIcon as FIF
+
+from config import cfg
+from core import preparePlan, offlineValues, launchGame
+
+PLAN_STATES = {"cached": "缓存命中", "restamped": "缓存有效, 已更新记录", "built": "重新生成"}
 
 
 class HomePage(QWidget):
+    launchFinished = Signal(str)
+
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self.setObjectName("HomePage")
+        self.launchFinished.connect(self._launchFinished)
+        self.initUI()
 
     def initUI(self):
-        ...
+        mainLayout = QVBoxLayout()
+        mainLayout.setContentsMargins(36, 20, 36, 36)
+        mainLayout.addWidget(SubtitleLabel("MinecraftLauncherDemo"))
+        mainLayout.addStretch()
+
+        launchLayout = QHBoxLayout()
+        self.versionCombo = ComboBox()
+        self.versionCombo.setMinimumWidth(200)
+        self.playerEdit = LineEdit()
+        self.playerEdit.setPlaceholderText("玩家名")
+        self.playerEdit.setText(cfg.playerName.value)
+        self.playerEdit.setMaximumWidth(200)
+        self.launchButton = PrimaryPushButton(FIF.PLAY, "启动游戏")
+        self.launchButton.clicked.connect(self.launch)
+        launchLayout.addWidget(self.versionCombo)
+        launchLayout.addWidget(self.playerEdit)
+        launchLayout.addStretch()
+        launchLayout.addWidget(self.launchButton)
+
+        self.statusText = BodyLabel("")
+        self.statusText.setWordWrap(True)
+        self.statusText.setAlignment(Qt.AlignRight)
+
+        mainLayout.addLayout(launchLayout)
+        mainLayout.addWidget(self.statusText)
+        self.setLayout(mainLayout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refreshVersions()
+
+    def refreshVersions(self):
+        """列出已安装的版本 (versions/<版本>/<版本>.json)"""
+        versionsDir = Path(cfg.minecraftPath.value) / "versions"
+        try:
+            with os.scandir(versionsDir) as entries:
+                versions = sorted(e.name for e in entries if e.is_dir() and (Path(e.path) / f"{e.name}.json").is_file())
+        except OSError:
+            versions = []
+        current = self.versionCombo.currentText() or cfg.lastVersion.value
+        self.versionCombo.clear()
+        self.versionCombo.addItems(versions)
+        if current in versions: self.versionCombo.setCurrentText(current)
+        self.launchButton.setEnabled(bool(versions))
+
+    def launch(self):
+        ver = self.versionCombo.currentText()
+        name = self.playerEdit.text().strip() or "Steve"
+        if not ver: return
+        cfg.set(cfg.playerName, name)
+        cfg.set(cfg.lastVersion, ver)
+        self.launchButton.setEnabled(False)
+        self.statusText.setText(f"⏳ 正在启动 {ver}")
+        Thread(target=self._launch, args=(ver, name)).start()
+
+    def _launch(self, ver: str, name: str):
+        gameDir = Path(cfg.minecraftPath.value)
+        try:
+            start = time.perf_counter()
+            prepared = preparePlan(gameDir, ver)
+            planTime = time.perf_counter() - start
+            if missing := prepared.plan.missing():
+                self.launchFinished.emit(f"❌ 缺少 {len(missing)} 个文件, 请重新下载 {ver}: {os.path.basename(missing[0])}")
+                return
+            process = launchGame(
+                prepared.plan, cfg.javaPath.value, offlineValues(name), gameDir,
+                extraJvmArgs=[f"-Xmx{cfg.maxMemory.value}M"], log=gameDir / "logs" / f"launcher-{ver}.log"
+            )
+            total = time.perf_counter() - start
+            self.launchFinished.emit(
+                f"🚀 已启动 {ver} (PID {process.pid})  |  启动参数: {PLAN_STATES[prepared.state]} {planTime * 1000:.1f} ms"
+                + (f", 本地库 {prepared.extract}" if prepared.extract else "")
+                + f"  |  共 {total * 1000:.1f} ms"
+            )
+        except Exception as e:
+            self.launchFinished.emit(f"❌ 启动 {ver} 失败: {e}")
+
+    def _launchFinished(self, text: str):
+        self.statusText.setText(text)
+        self.launchButton.setEnabled(True)
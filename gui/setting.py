@@ -4,7 +4,8 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QFileDialog
 from qfluentwidgets import OptionsSettingCard, FluentIcon as FIF, PushSettingCard, ComboBoxSettingCard, \
-    SettingCardGroup, SettingCard, FluentIconBase, SpinBox, ConfigItem, SingleDirectionScrollArea
+    SettingCardGroup, SettingCard, FluentIconBase, SpinBox, ConfigItem, SingleDirectionScrollArea, SwitchSettingCard, \
+    LineEdit
 
 from config import cfg
 
@@ -26,6 +27,23 @@ class SpinBoxSettingCard(SettingCard):
         self.spinBox.setValue(value)
         cfg.set(self.configItem, value)
 
+class LineEditSettingCard(SettingCard):
+    def __init__(self, configItem: ConfigItem, icon: Union[str, QIcon, FluentIconBase], title, content=None, parent=None):
+        super().__init__(icon, title, content, parent)
+        self.configItem = configItem
+        self.lineEdit = LineEdit()
+        self.lineEdit.setMinimumWidth(240)
+        self.lineEdit.setText(configItem.value)
+        self.hBoxLayout.addWidget(self.lineEdit, 0, Qt.AlignRight)
+        self.hBoxLayout.addSpacing(16)
+
+        self.lineEdit.editingFinished.connect(lambda: self.setValue(self.lineEdit.text().strip()))
+
+    def setValue(self, value: str):
+        if not isinstance(value, str) or not value: return
+        self.lineEdit.setText(value)
+        cfg.set(self.configItem, value)
+
 class PathSettingCard(PushSettingCard):
     def __init__(self, configItem: ConfigItem, text, icon: Union[str, QIcon, FluentIconBase], title, url, parent=None):
         super().__init__(text, icon, title, url, parent)
@@ -47,6 +65,12 @@ class PathSettingCard(PushSettingCard):
         cfg.set(self.configItem, value)
 
 
+class FileSettingCard(PathSettingCard):
+    def click(self):
+        # 取消选择时返回空字符串, 保留原来的值
+        if path := QFileDialog.getOpenFileName(self, "选择文件")[0]: self.setValue(path)
+
+
 class SettingPage(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent=parent)
@@ -80,12 +104,67 @@ class SettingPage(QWidget):
             cfg.minecraftPath.value
         )
 
+        objectStore = SwitchSettingCard(
+            FIF.LINK,
+            "共享对象库",
+            "多个 Minecraft 目录共用资源文件与依赖库, 已有的文件以硬链接引用, 无需重复下载",
+            cfg.objectStore
+        )
+
+        objectStorePath = PathSettingCard(
+            cfg.objectStorePath,
+            "选择文件夹",
+            FIF.LIBRARY,
+            "共享对象库目录",
+            cfg.objectStorePath.value
+        )
+
+        javaPath = FileSettingCard(
+            cfg.javaPath,
+            "选择文件",
+            FIF.COMMAND_PROMPT,
+            "Java 路径",
+            cfg.javaPath.value
+        )
+
+        maxMemory = SpinBoxSettingCard(
+            cfg.maxMemory,
+            FIF.IOT,
+            "最大内存 (MB)",
+            "游戏可使用的最大内存 (-Xmx)",
+            (256, 65536),
+            cfg.maxMemory.value
+        )
+
         originCombo = ComboBoxSettingCard(
             cfg.versionsOrigin,
             FIF.DOWNLOAD,
             "版本列表源",
             "修改源可能获取版本更快",
-            ["官方源", "镜像源 (BMCLAPI)"]
+            ["官方源", "镜像源 (BMCLAPI)", "局域网缓存"]
+        )
+
+        lanOrigin = LineEditSettingCard(
+            cfg.lanOrigin,
+            FIF.WIFI,
+            "局域网缓存地址",
+            "下载源选择局域网缓存时使用, 填写开启了缓存服务的启动器地址"
+        )
+
+        lanServer = SwitchSettingCard(
+            FIF.SHARE,
+            "局域网缓存服务",
+            "向局域网内的其他启动器提供本机已下载的资源文件、依赖库与版本文件, 本机没有的文件转到上游下载源",
+            cfg.lanServer
+        )
+
+        lanServerPort = SpinBoxSettingCard(
+            cfg.lanServerPort,
+            FIF.CONNECT,
+            "缓存服务端口",
+            "修改后正在运行的缓存服务自动重启",
+            (1, 65535),
+            cfg.lanServerPort.value
         )
 
         downloadTimeout = SpinBoxSettingCard(
@@ -115,6 +194,94 @@ class SettingPage(QWidget):
             cfg.downloadTask.value
         )
 
+        adaptiveConcurrency = SwitchSettingCard(
+            FIF.SPEED_MEDIUM,
+            "自适应并发",
+            "根据吞吐、出错率和延迟自动调整同时下载数, 上方线程数作为上限",
+            cfg.adaptiveConcurrency
+        )
+
+        bandwidthLimit = SpinBoxSettingCard(
+            cfg.bandwidthLimit,
+            FIF.SPEED_OFF,
+            "带宽上限 (Mbps)",
+            "限制全部下载的总带宽, 0 表示不限",
+            (0, 10000),
+            cfg.bandwidthLimit.value
+        )
+
+        downloadEngine = ComboBoxSettingCard(
+            cfg.downloadEngine,
+            FIF.SPEED_HIGH,
+            "下载引擎",
+            "异步引擎用单线程事件循环处理大量小文件",
+            ["线程池", "异步 (asyncio)"]
+        )
+
+        asyncTask = SpinBoxSettingCard(
+            cfg.asyncTask,
+            FIF.APPLICATION,
+            "异步并发数",
+            "异步引擎最大同时下载数",
+            (1, 1024),
+            cfg.asyncTask.value
+        )
+
+        originRace = SwitchSettingCard(
+            FIF.GLOBE,
+            "多源竞速",
+            "测速选择最快的下载源, 慢请求对冲到备用源, 故障源自动摘除",
+            cfg.originRace
+        )
+
+        prefetchMeta = SwitchSettingCard(
+            FIF.SYNC,
+            "预取版本文件",
+            "空闲时预先下载列表中可见版本的版本 JSON 与资源索引, 点击下载后立即开始并行下载",
+            cfg.prefetchMeta
+        )
+
+        http2 = SwitchSettingCard(
+            FIF.SPEED_HIGH,
+            "HTTP/2 多路复用",
+            "资源文件在少量连接上并发请求, 减少小文件的往返等待; 需要安装 httpx[http2], 源不支持时自动使用 HTTP/1.1",
+            cfg.http2
+        )
+
+        downloadSegments = SpinBoxSettingCard(
+            cfg.downloadSegments,
+            FIF.LAYOUT,
+            "分段数",
+            "大文件拆分为多段并行下载",
+            (1, 16),
+            cfg.downloadSegments.value
+        )
+
+        segmentThreshold = SpinBoxSettingCard(
+            cfg.segmentThreshold,
+            FIF.ZOOM,
+            "分段阈值 (MB)",
+            "超过该大小的文件才分段下载",
+            (1, 1024),
+            cfg.segmentThreshold.value
+        )
+
+        logCapacity = SpinBoxSettingCard(
+            cfg.logCapacity,
+            FIF.HISTORY,
+            "日志行数",
+            "下载页最多保留的日志行数 (重启后生效)",
+            (100, 100000),
+            cfg.logCapacity.value
+        )
+
+        logSpill = SwitchSettingCard(
+            FIF.SAVE,
+            "保存完整日志",
+            "把全部下载日志写入缓存目录下的 logs 文件夹",
+            cfg.logSpill
+        )
+
         individuation = SettingCardGroup("个性化")
         individuation.addSettingCard(themeOptions)
         individuation.setDisabled(True)
@@ -125,12 +292,36 @@ class SettingPage(QWidget):
 
         game = SettingCardGroup("游戏")
         game.addSettingCard(minecraftPath)
+        game.addSettingCard(objectStore)
+        game.addSettingCard(objectStorePath)
+
+        launch = SettingCardGroup("启动")
+        launch.addSettingCard(javaPath)
+        launch.addSettingCard(maxMemory)
 
         download = SettingCardGroup("下载")
         download.addSettingCard(originCombo)
+        download.addSettingCard(lanOrigin)
+        download.addSettingCard(originRace)
+        download.addSettingCard(prefetchMeta)
         download.addSettingCard(downloadTimeout)
         download.addSettingCard(downloadCount)
         download.addSettingCard(downloadTask)
+        download.addSettingCard(adaptiveConcurrency)
+        download.addSettingCard(bandwidthLimit)
+        download.addSettingCard(downloadSegments)
+        download.addSettingCard(segmentThreshold)
+        download.addSettingCard(downloadEngine)
+        download.addSettingCard(asyncTask)
+        download.addSettingCard(http2)
+
+        lan = SettingCardGroup("局域网")
+        lan.addSettingCard(lanServer)
+        lan.addSettingCard(lanServerPort)
+
+        log = SettingCardGroup("日志")
+        log.addSettingCard(logCapacity)
+        log.addSettingCard(logSpill)
 
         scrollArea = SingleDirectionScrollArea(self)
         scrollArea.setWidgetResizable(True)
@@ -140,7 +331,10 @@ class SettingPage(QWidget):
         contentLayout.addWidget(individuation)
         contentLayout.addWidget(temp)
         contentLayout.addWidget(game)
+        contentLayout.addWidget(launch)
         contentLayout.addWidget(download)
+        contentLayout.addWidget(lan)
+        contentLayout.addWidget(log)
         contentLayout.addStretch(1)
 
         scrollArea.setWidget(contentWidget)
@@ -1,14 +1,15 @@
-import json
 import os
 import sys
+from pathlib import Path
 from threading import Thread
 
-import requests
-from PySide6.QtCore import Signal
+from PySide6.QtCore import Signal, QTimer
 from PySide6.QtWidgets import QApplication
-from qfluentwidgets import FluentWindow, FluentIcon as FIF, NavigationItemPosition, setTheme, Theme
+from qfluentwidgets import FluentWindow, FluentIcon as FIF, NavigationItemPosition, setTheme, Theme, InfoBar, \
+    InfoBarPosition
 
-from config import cfg
+from config import cfg, Config
+from core import sessions, Manifest, ManifestCache, CacheServer, setLanOrigin
 from gui import *
 
 
@@ -16,6 +17,7 @@ class MainWindow(FluentWindow):
     updateRelease = Signal(list)
     updateSnapshot = Signal(list)
     updateOld = Signal(list)
+    versionError = Signal(str)
 
     def __init__(self):
         super().__init__()
@@ -27,10 +29,24 @@ class MainWindow(FluentWindow):
         self.oldVersion = []    # 远古版
         self.aprFoolVersion = []    # 愚人节版
 
+        setLanOrigin(cfg.lanOrigin.value)
+        cfg.lanOrigin.valueChanged.connect(setLanOrigin)
+
+        self.versionError.connect(lambda text: InfoBar.warning(
+            "获取版本列表失败", text, parent=self, position=InfoBarPosition.TOP_RIGHT, duration=5000
+        ))
         Thread(target=self.initVersion).start()
         self.initNavigation()
         self.initFolder()
 
+        self.cacheServer = None
+        cfg.lanServer.valueChanged.connect(self.updateCacheServer)
+        # 端口停止输入一段时间后再重启服务, 避免逐位输入时反复绑定中间值
+        self.portTimer = QTimer(self, singleShot=True, interval=800)
+        self.portTimer.timeout.connect(self.restartCacheServer)
+        cfg.lanServerPort.valueChanged.connect(self.portTimer.start)
+        self.updateCacheServer(cfg.lanServer.value)
+
     def initNavigation(self):
         self.addSubInterface(
             HomePage(self),
@@ -52,27 +68,52 @@ class MainWindow(FluentWindow):
         )
 
     def initVersion(self):
-        version = {}
+        cache = ManifestCache(Path(cfg.tempPath.value) / "MinecraftLauncherDemo" / "version_manifest_v2.cache")
+        manifest = cache.load()
+        if manifest: self.updateVersion(manifest)     # 先显示缓存, 再在后台重新验证
         try:
-            with open(f"{cfg.tempPath.value}/MinecraftLauncherDemo/version_manifest.json") as f:
-                version = json.load(f)
+            session = sessions.get(cfg.versionsOrigin.value.name, cfg.downloadTask.value)
+            fresh = cache.refresh(cfg.versionsOrigin.value.value, session, cfg.downloadTimeout.value, manifest)
         except Exception as e:
-            version = requests.get(cfg.versionsOrigin.value.value.Versions / "mc/game/version_manifest.json").json()
-            os.makedirs(f"{cfg.tempPath.value}/MinecraftLauncherDemo", exist_ok=True)
-            with open(f"{cfg.tempPath.value}/MinecraftLauncherDemo/version_manifest.json", "w", encoding="utf-8") as f:
-                json.dump(version, f)
-        finally:
-            if not version: return
-            for v in version["versions"]:
-                if v["type"] == "release":
-                    self.releaseVersion.append(v)
-                elif v["type"] == "old_beta" or v["type"] == "old_alpha":
-                    self.oldVersion.append(v)
-                else:
-                    self.snapshotVersion.append(v)
-            self.updateRelease.emit(self.releaseVersion)
-            self.updateSnapshot.emit(self.snapshotVersion)
-            # self.updateAncient.emit(self.ancientVersion)
+            # 后台线程中不能直接操作界面, 通过信号提示
+            self.versionError.emit(f"{'正在显示缓存的版本列表; ' if manifest else ''}{e}")
+            return
+        if fresh: self.updateVersion(fresh)
+
+    def updateVersion(self, manifest: Manifest):
+        self.releaseVersion = manifest.buckets["release"]
+        self.snapshotVersion = manifest.buckets["snapshot"]
+        self.oldVersion = manifest.buckets["old"]
+        self.updateRelease.emit(self.releaseVersion)
+        self.updateSnapshot.emit(self.snapshotVersion)
+        self.updateOld.emit(self.oldVersion)
+
+    def updateCacheServer(self, enabled: bool):
+        """开启 / 关闭局域网缓存服务, 启动失败 (端口被占用等) 时提示并关闭开关"""
+        if self.cacheServer: self.cacheServer.stop()
+        self.cacheServer = None
+        if not enabled: return
+        temp = Path(cfg.tempPath.value) / "MinecraftLauncherDemo"
+        origin = cfg.versionsOrigin.value
+        try:
+            self.cacheServer = CacheServer(
+                cfg.minecraftPath.value,
+                metaCachePath=temp / "meta",
+                manifestPath=temp / "version_manifest_v2.cache",
+                storePath=cfg.objectStorePath.value if cfg.objectStore.value else None,
+                upstream=(Config.VersionsOrigin.Official if origin is Config.VersionsOrigin.Lan else origin).value,
+                port=cfg.lanServerPort.value
+            ).start()
+        except OSError as e:
+            InfoBar.error(
+                "局域网缓存服务启动失败", f"端口 {cfg.lanServerPort.value}: {e.strerror or e}",
+                parent=self, position=InfoBarPosition.TOP_RIGHT, duration=5000
+            )
+            cfg.set(cfg.lanServer, False)
+
+    def restartCacheServer(self):
+        """修改端口后重启正在运行的缓存服务"""
+        if self.cacheServer and self.cacheServer.port != cfg.lanServerPort.value: self.updateCacheServer(True)
 
     def initFolder(self):
         os.makedirs(cfg.minecraftPath.value, exist_ok=True)